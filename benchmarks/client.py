@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+"""
+Benchmark the hot paths of the API client.
+
+All scenarios run against an in-memory `corenetworks.fake.FakeBackend`, either
+in-process through `MemoryTransport` (default, measures the client overhead only)
+or over HTTP through a local `FakeServer`. Traffic can be recorded and replayed
+offline. Results are printed as a table and can be written as JSON to track
+regressions over time:
+
+    python -m benchmarks.client --output .benchmarks/results.json
+    python -m benchmarks.client --compare .benchmarks/results.json
+    python -m benchmarks.client --record traffic.json
+    python -m benchmarks.client --replay traffic.json
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import statistics
+import timeit
+
+import corenetworks
+from corenetworks import CoreNetworks
+from corenetworks.authenticators import CoreNetworksBasicAuth
+from corenetworks.fake import FakeBackend
+from corenetworks.fake import FakeServer
+from corenetworks.transport import HTTPTransport
+from corenetworks.transport import MemoryTransport
+from corenetworks.transport import RecordingTransport
+from corenetworks.transport import ReplayTransport
+from corenetworks.transport import Transport
+
+ZONE = "example.com"
+ENDPOINT = "http://fake.invalid"
+FILTER = {"type": ["A", "AAAA"], "name": "www"}
+RECORD = {"name": "www", "ttl": 1800, "type": "A", "data": "127.0.0.1"}
+
+
+def _records(count):
+    return [{
+        "name": "host{i}".format(i=i),
+        "ttl": 1800,
+        "type": "A",
+        "data": "10.0.{a}.{b}".format(a=i // 256, b=i % 256)
+    } for i in range(count)]
+
+
+class CountingTransport(Transport):
+    """Count the requests sent through another transport."""
+
+    def __init__(self, transport):
+        super(CountingTransport, self).__init__()
+        self.transport = transport
+        self.count = 0
+
+    def send(self, request, stream=False, **kwargs):
+        self.count += 1
+        return self.transport.send(request, stream=stream, **kwargs)
+
+    def close(self):
+        self.transport.close()
+
+
+class Environment():
+    """Client wired to a fake backend through the selected transport."""
+
+    def __init__(self, transport="memory", zone_size=100, record=None, replay=None):
+        self.backend = FakeBackend()
+        self.backend.add_user("user", "password")
+        self.backend.add_token("token")
+        self.backend.add_zone(ZONE, records=_records(zone_size) + [RECORD])
+
+        self.server = None
+        self.endpoint = ENDPOINT
+        self.recorder = None
+
+        if replay:
+            inner = ReplayTransport(replay)
+        elif transport == "http":
+            self.server = FakeServer(self.backend).start()
+            self.endpoint = self.server.endpoint
+            inner = HTTPTransport()
+        else:
+            inner = MemoryTransport(self.backend)
+
+        if record:
+            inner = self.recorder = RecordingTransport(inner)
+
+        self.transport = CountingTransport(inner)
+        self.client = CoreNetworks(
+            api_token="token", endpoint=self.endpoint, transport=self.transport
+        )
+        self.revalidating = CoreNetworks(
+            api_token="token", endpoint=self.endpoint, transport=self.transport, revalidate=True
+        )
+
+    def requests(self, func):
+        """Count the API requests sent by a single call of `func`."""
+        before = self.transport.count
+        func()
+        return self.transport.count - before
+
+    def close(self):
+        self.client.close()
+        self.revalidating.close()
+        if self.server is not None:
+            self.server.stop()
+
+
+def bench_records_validate(env):
+    validate = env.client._CoreNetworks__validate
+    return lambda: validate(FILTER, "filter")
+
+
+def bench_records_filter(env):
+    json_to_filter = env.client._CoreNetworks__json_to_filter
+    return lambda: json_to_filter(FILTER)
+
+
+def bench_records_prepare(env):
+    from requests import Request
+
+    session = env.client._session
+    url = "{endpoint}/dnszones/{zone}/records/?type[]=A&type[]=AAAA&name=www".format(
+        endpoint=env.endpoint, zone=ZONE
+    )
+
+    def prepare():
+        request = Request(method="GET", url=url, auth=env.client._auth)
+        return session.prepare_request(request)
+
+    return prepare
+
+
+def bench_records_normalize(env):
+    normalize = env.client._CoreNetworks__normalize
+    result = env.backend.records(ZONE)
+    return lambda: normalize(result)
+
+
+def bench_records(env):
+    return lambda: env.client.records(ZONE, FILTER)
+
+
+def bench_records_revalidate(env):
+    return lambda: env.revalidating.records(ZONE)
+
+
+def bench_add_record(env):
+    # alternate the TTL, so every call replaces the existing record instead of a no-op
+    ttls = itertools.cycle([60, RECORD["ttl"]])
+    return lambda: env.client.add_record(ZONE, dict(RECORD, ttl=next(ttls)))
+
+
+def bench_login(env):
+    session = env.client._session
+
+    def login():
+        # the authenticator is lazy, log in explicitly to measure the login request
+        CoreNetworksBasicAuth("user", "password", env.endpoint, session=session).login()
+
+    return login
+
+
+def bench_bulk(env, size):
+    records = [dict(r, name="bulk-" + r["name"]) for r in _records(size)]
+
+    def bulk():
+        env.client.add_records(ZONE, records)
+        env.client.delete_record(ZONE, {"name": "bulk-host0", "type": "A"})
+        for r in records[1:]:
+            env.client.delete_record(ZONE, {"name": r["name"], "type": "A"})
+
+    return bulk
+
+
+SCENARIOS = [
+    ("records.validate", bench_records_validate, 1),
+    ("records.json_to_filter", bench_records_filter, 1),
+    ("records.prepare_request", bench_records_prepare, 1),
+    ("records.normalize", bench_records_normalize, 1),
+    ("records", bench_records, 1),
+    ("records.revalidate", bench_records_revalidate, 1),
+    ("add_record", bench_add_record, 1),
+    ("login", bench_login, 1),
+]
+
+
+def measure(func, number, repeat):
+    timings = [t / number for t in timeit.repeat(func, number=number, repeat=repeat)]
+
+    return {
+        "mean": statistics.mean(timings),
+        "median": statistics.median(timings),
+        "min": min(timings),
+        "max": max(timings),
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "rounds": repeat,
+        "iterations": number,
+    }
+
+
+def run(
+    transport="memory",
+    number=200,
+    repeat=5,
+    bulk_size=100,
+    zone_size=100,
+    record=None,
+    replay=None,
+):
+    env = Environment(transport=transport, zone_size=zone_size, record=record, replay=replay)
+    results = []
+
+    scenarios = SCENARIOS + [("bulk.add_delete", lambda e: bench_bulk(e, bulk_size), bulk_size)]
+
+    try:
+        for name, factory, items in scenarios:
+            func = factory(env)
+            func()
+
+            iterations = number if items == 1 else max(1, number // items)
+            stats = measure(func, iterations, repeat)
+            stats["name"] = name
+            stats["items"] = items
+            stats["requests"] = env.requests(func)
+            stats["ops"] = items / stats["median"]
+            results.append(stats)
+
+        if env.recorder is not None:
+            env.recorder.save(record)
+    finally:
+        env.close()
+
+    return {
+        "version": corenetworks.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "datetime": datetime.datetime.utcnow().isoformat(),
+        "options": {
+            "transport": "replay" if replay else transport,
+            "number": number,
+            "repeat": repeat,
+            "bulk_size": bulk_size,
+            "zone_size": zone_size,
+        },
+        "benchmarks": results,
+    }
+
+
+def report(results, baseline=None):
+    previous = {}
+    if baseline:
+        previous = dict((b["name"], b) for b in baseline["benchmarks"])
+
+    print(
+        "{:<26}{:>14}{:>14}{:>14}{:>10}{:>10}".format(
+            "benchmark", "median (us)", "stddev (us)", "ops/s", "requests", "change"
+        )
+    )
+
+    for b in results["benchmarks"]:
+        change = ""
+        if b["name"] in previous:
+            change = "{:+.1%}".format(b["median"] / previous[b["name"]]["median"] - 1)
+
+        print(
+            "{:<26}{:>14.1f}{:>14.1f}{:>14.0f}{:>10}{:>10}".format(
+                b["name"], b["median"] * 1e6, b["stddev"] * 1e6, b["ops"], b["requests"], change
+            )
+        )
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Core Networks API client.")
+    parser.add_argument("--transport", choices=("memory", "http"), default="memory")
+    parser.add_argument("--number", type=int, default=200, help="iterations per round")
+    parser.add_argument("--repeat", type=int, default=5, help="number of rounds")
+    parser.add_argument("--bulk-size", type=int, default=100)
+    parser.add_argument("--zone-size", type=int, default=100)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    parser.add_argument("--record", help="record the API traffic to this file")
+    parser.add_argument("--replay", help="replay recorded API traffic instead of a backend")
+    options = parser.parse_args(args)
+
+    results = run(
+        transport=options.transport,
+        number=options.number,
+        repeat=options.repeat,
+        bulk_size=options.bulk_size,
+        zone_size=options.zone_size,
+        record=options.record,
+        replay=options.replay,
+    )
+
+    baseline = None
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+
+    report(results, baseline)
+
+    if options.output:
+        directory = os.path.dirname(os.path.abspath(options.output))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(options.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
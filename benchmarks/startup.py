@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+"""
+Benchmark the startup cost of short-lived processes.
+
+Every round runs a fresh interpreter that imports the package, creates a client
+and sends the first request (login and a filtered record listing) to an
+in-process `corenetworks.fake.FakeBackend`. A second client sends the same
+request with a token from a `corenetworks.store.FileTokenStore` instead of a
+login. Results can be written as JSON and compared with a previous run:
+
+    python -m benchmarks.startup --output .benchmarks/startup.json
+    python -m benchmarks.startup --compare .benchmarks/startup.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = """
+import json
+import sys
+import time
+
+timings = {}
+
+start = time.perf_counter()
+import corenetworks
+timings["import"] = time.perf_counter() - start
+heavy = [m for m in ("requests", "jsonschema", "asyncio") if m in sys.modules]
+
+start = time.perf_counter()
+from corenetworks import CoreNetworks
+timings["import.client"] = time.perf_counter() - start
+
+from corenetworks.transport import MemoryTransport
+
+transport = MemoryTransport()
+transport.backend.add_user("user", "password")
+transport.backend.add_zone("example.com")
+
+start = time.perf_counter()
+client = CoreNetworks("user", "password", endpoint="http://fake.invalid", transport=transport)
+timings["construct"] = time.perf_counter() - start
+
+start = time.perf_counter()
+client.records("example.com", {"type": "NS"})
+timings["first_request"] = time.perf_counter() - start
+
+from corenetworks.store import FileTokenStore
+
+transport.backend.add_token("stored")
+
+start = time.perf_counter()
+client = CoreNetworks(
+    "user",
+    "password",
+    endpoint="http://fake.invalid",
+    transport=transport,
+    token_store=FileTokenStore(sys.argv[1]),
+)
+client.records("example.com", {"type": "NS"})
+timings["first_request.store"] = time.perf_counter() - start
+
+json.dump({"timings": timings, "heavy": heavy}, sys.stdout)
+"""
+
+PHASES = ("import", "import.client", "construct", "first_request")
+
+#: Phases that are reported but not part of the total, a process takes one of the paths.
+EXTRA_PHASES = ("first_request.store",)
+
+
+def probe(store):
+    output = subprocess.check_output([sys.executable, "-c", PROBE, store])
+    return json.loads(output.decode("utf-8"))
+
+
+def run(repeat=20):
+    from corenetworks.store import FileTokenStore
+
+    directory = tempfile.mkdtemp()
+    try:
+        store = os.path.join(directory, "tokens.json")
+        expires = datetime.datetime.now() + datetime.timedelta(days=1)
+        FileTokenStore(store).put("user", "password", "http://fake.invalid", "stored", expires)
+
+        probes = [probe(store) for _ in range(repeat)]
+    finally:
+        shutil.rmtree(directory)
+
+    results = []
+
+    for name in PHASES + EXTRA_PHASES:
+        timings = [p["timings"][name] for p in probes]
+        results.append({
+            "name": name,
+            "median": statistics.median(timings),
+            "min": min(timings),
+            "max": max(timings),
+            "rounds": repeat,
+        })
+
+    totals = [sum(p["timings"][name] for name in PHASES) for p in probes]
+    results.append({
+        "name": "total",
+        "median": statistics.median(totals),
+        "min": min(totals),
+        "max": max(totals),
+        "rounds": repeat,
+    })
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "heavy_on_import": probes[0]["heavy"],
+        "benchmarks": results,
+    }
+
+
+def report(results, baseline=None):
+    previous = {}
+    if baseline:
+        previous = dict((b["name"], b) for b in baseline["benchmarks"])
+
+    print("{:<22}{:>14}{:>14}{:>10}".format("phase", "median (ms)", "min (ms)", "change"))
+
+    for b in results["benchmarks"]:
+        change = ""
+        if b["name"] in previous:
+            change = "{:+.1%}".format(b["median"] / previous[b["name"]]["median"] - 1)
+
+        print(
+            "{:<22}{:>14.2f}{:>14.2f}{:>10}".format(
+                b["name"], b["median"] * 1e3, b["min"] * 1e3, change
+            )
+        )
+
+    print("modules loaded by import: {}".format(", ".join(results["heavy_on_import"]) or "none"))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark import and client startup time.")
+    parser.add_argument("--repeat", type=int, default=20, help="number of interpreter runs")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    options = parser.parse_args(args)
+
+    results = run(repeat=options.repeat)
+
+    baseline = None
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+
+    report(results, baseline)
+
+    if options.output:
+        directory = os.path.dirname(os.path.abspath(options.output))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(options.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""Benchmark the per-call cost of request parameter validation."""
+
+import copy
+import timeit
+
+import jsonschema
+
+from corenetworks.schema import SCHEMAS
+from corenetworks.schema import validation_error
+
+CASES = {
+    "filter": {
+        "type": ["A", "AAAA"],
+        "name": "test"
+    },
+    "add_record": {
+        "name": "test",
+        "type": "A",
+        "data": "127.0.0.1",
+        "ttl": 1800
+    },
+    "delete_record": {
+        "name": "test",
+        "type": "A"
+    },
+}
+
+
+def uncompiled(data, name):
+    jsonschema.validate(data, copy.deepcopy(SCHEMAS[name]))
+
+
+def compiled(data, name):
+    validation_error(data, name)
+
+
+def main(number=2000):
+    print("{:<16}{:>16}{:>16}{:>10}".format("schema", "before (us)", "after (us)", "speedup"))
+
+    for name, data in CASES.items():
+        before = timeit.timeit(lambda: uncompiled(data, name), number=number) / number * 1e6
+        after = timeit.timeit(lambda: compiled(data, name), number=number) / number * 1e6
+        print("{:<16}{:>16.1f}{:>16.1f}{:>9.1f}x".format(name, before, after, before / after))
+
+
+if __name__ == "__main__":
+    main()
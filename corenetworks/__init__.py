@@ -1,6 +1,39 @@
 # -*- coding: utf-8 -*-
 """Default package."""
 
-from corenetworks.client import CoreNetworks  # noqa
+import importlib
+import sys
 
 __version__ = "0.0.0"
+
+# public classes are imported on first access, `import corenetworks` stays cheap
+_LAZY = {
+    "AsyncCoreNetworks": "corenetworks.aio",
+    "CoreNetworks": "corenetworks.client",
+    "CoreNetworksPool": "corenetworks.pool",
+}
+
+__all__ = sorted(_LAZY)
+
+
+def __getattr__(name):  # noqa
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(
+            "module {mod!r} has no attribute {name!r}".format(mod=__name__, name=name)
+        )
+
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():  # noqa
+    return sorted(list(globals()) + __all__)
+
+
+if sys.version_info < (3, 7):
+    # module level __getattr__ requires PEP 562
+    from corenetworks.aio import AsyncCoreNetworks  # noqa
+    from corenetworks.client import CoreNetworks  # noqa
+    from corenetworks.pool import CoreNetworksPool  # noqa
@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""Asyncio API client."""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .client import CoreNetworks
+from .transport import AsyncTransport
+from .transport import HTTPTransport
+
+
+class AsyncCoreNetworks():
+    """
+    Create authenticated asyncio API client.
+
+    The client exposes the same surface as `corenetworks.client.CoreNetworks` as coroutines.
+    Requests are dispatched to a bounded worker pool sharing one pooled HTTP session, so
+    at most `concurrency` requests are in flight at the same time.
+
+    The `transport` of the client is an `corenetworks.transport.AsyncTransport` that
+    shares the worker pool; other transports are wrapped in one.
+    """
+
+    def __init__(
+        self,
+        user=None,
+        password=None,
+        api_token=None,
+        auto_commit=None,
+        concurrency=10,
+        **kwargs
+    ):
+        kwargs.setdefault("pool_maxsize", concurrency)
+
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+        transport = kwargs.pop("transport", None)
+        if kwargs.get("session") is None:
+            if transport is None:
+                transport = HTTPTransport(
+                    pool_connections=kwargs.get("pool_connections") or 10,
+                    pool_maxsize=kwargs["pool_maxsize"],
+                    pool_block=kwargs.get("pool_block") or False,
+                )
+            if not isinstance(transport, AsyncTransport):
+                transport = AsyncTransport(transport, executor=self._executor)
+
+        self.transport = transport
+        self._client = CoreNetworks(
+            user, password, api_token, auto_commit, transport=transport, **kwargs
+        )
+
+    async def __aenter__(self):  # noqa
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):  # noqa
+        await self.aclose()
+
+    @property
+    def config(self):
+        return self._client.config
+
+    @property
+    def metrics(self):
+        return self._client.metrics
+
+    def register_hook(self, event, hook):
+        """Register a request hook, see `corenetworks.client.CoreNetworks.register_hook`."""
+        self._client.register_hook(event, hook)
+
+    def close(self):
+        """Shut down the worker pool and release all pooled connections."""
+        self._executor.shutdown(wait=True)
+        self._client.close()
+
+    async def aclose(self):
+        """
+        Shut down the worker pool and release all pooled connections.
+
+        Waiting for running calls and committing pending zones blocks, so `close` runs
+        in the default executor of the event loop and not on the loop itself.
+        """
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self.close)
+
+    async def _run(self, func, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    # ZONES
+
+    async def zones(self):
+        """
+        Get the list of DNS zones.
+
+        Returns:
+            list: List of zones.
+
+        """
+        return await self._run(self._client.zones)
+
+    async def zone(self, zone):
+        """
+        Get details about a DNS zone.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+
+        Returns:
+            list: List of zones.
+
+        """
+        return await self._run(self._client.zone, zone)
+
+    # RECORDS
+
+    async def records(self, zone, params={}):
+        """
+        Get the list of records for the specific domain.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+            params (dict): Dictionary of filter parameters.
+                See `corenetworks.client.CoreNetworks.records`.
+
+        Returns:
+            list: List of matching records.
+
+        """
+        return await self._run(self._client.records, zone, params)
+
+    async def records_many(self, zones, params={}):
+        """
+        Get the list of records for multiple domains concurrently.
+
+        Args:
+            zones (list): Names of the target DNS zones.
+            params (dict): Dictionary of filter parameters applied to every zone.
+
+        Returns:
+            dict: Mapping of zone name to the list of matching records.
+
+        """
+        results = await asyncio.gather(*[self.records(zone, params) for zone in zones])
+
+        return dict(zip(zones, results))
+
+    async def add_record(self, zone, params, verify=False):
+        """
+        Create a record for the given domain.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+            params (dict): Dictionary of record parameters.
+                See `corenetworks.client.CoreNetworks.add_record`.
+            verify (bool): Fetch the created record from the API.
+
+        Returns:
+            list: List of added records.
+
+        """
+        return await self._run(self._client.add_record, zone, params, verify)
+
+    async def add_records(self, zone, records, commit=None):
+        """
+        Create multiple records for the given domain.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+            records (list): List of record parameter dictionaries.
+                See `corenetworks.client.CoreNetworks.add_records`.
+            commit (bool): Commit the zone once after all changes are applied.
+
+        Returns:
+            list: List of added records.
+
+        """
+        return await self._run(self._client.add_records, zone, records, commit)
+
+    async def sync_zone(self, zone, records, prune=False, dry_run=False, commit=None):
+        """
+        Converge the records of a DNS zone to the desired state.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+            records (list): List of desired record parameter dictionaries.
+                See `corenetworks.client.CoreNetworks.sync_zone`.
+            prune (bool): Delete existing records that are not part of the desired state.
+            dry_run (bool): Only compute the change set without applying it.
+            commit (bool): Commit the zone once after all changes are applied.
+
+        Returns:
+            dict: Change set with the lists of records to `delete` and to `add`.
+
+        """
+        return await self._run(self._client.sync_zone, zone, records, prune, dry_run, commit)
+
+    async def delete_record(self, zone, params):
+        """
+        Delete all DNS records of a zone that match the data.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+            params (dict): Dictionary of record parameters.
+                See `corenetworks.client.CoreNetworks.delete_record`.
+
+        Returns:
+            list: Empty list.
+
+        """
+        return await self._run(self._client.delete_record, zone, params)
+
+    async def commit(self, zone):
+        """
+        Commit changed records to the given DNS zone.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+
+        Returns:
+            list: Empty list.
+
+        """
+        return await self._run(self._client.commit, zone)
+
+    async def flush(self, zone=None):
+        """
+        Commit pending DNS zones immediately.
+
+        Args:
+            zone (str): Name of the DNS zone to commit. Defaults to all pending zones.
+
+        Returns:
+            list: Names of the committed zones.
+
+        """
+        return await self._run(self._client.flush, zone)
+
+    # WATCH
+
+    async def watch(self, zones=None, interval=60, max_interval=None, initial=False):
+        """
+        Poll DNS zones and yield record-level changes.
+
+        The zones are polled by the worker threads of the synchronous watcher, see
+        `corenetworks.client.CoreNetworks.watch`. At most `concurrency` zones are
+        polled at once.
+
+        Args:
+            zones (list): Names of the DNS zones to watch. Defaults to all zones.
+            interval (float): Seconds between two polls of a zone.
+            max_interval (float): Upper limit of the interval for zones without changes.
+            initial (bool): Yield the records of the first poll as added records.
+
+        Yields:
+            dict: The `zone` and lists of `added`, `removed` and `changed` records.
+
+        """
+        loop = asyncio.get_event_loop()
+        stop = threading.Event()
+        changes = self._client.watch(
+            zones,
+            interval=interval,
+            max_interval=max_interval,
+            max_workers=self.concurrency,
+            initial=initial,
+            stop=stop,
+        )
+
+        try:
+            while True:
+                # waiting for the next change blocks, keep it off the request workers
+                change = await loop.run_in_executor(None, next, changes, None)
+                if change is None:
+                    return
+                yield change
+        finally:
+            stop.set()
+            try:
+                changes.close()
+            except ValueError:
+                # still running in a worker after a cancellation, it ends with `stop`
+                pass
@@ -3,6 +3,7 @@
 
 import datetime
 import json
+import threading
 
 from requests import ConnectionError
 from requests import HTTPError
@@ -14,13 +15,38 @@ from .exceptions import AuthError
 
 
 class CoreNetworksBasicAuth(AuthBase):
-    """Define login based auth."""
-
-    def __init__(self, user, password, endpoint):
+    """
+    Define login based auth.
+
+    The login happens on the first request, not when the authenticator is
+    created. The token is refreshed lazily by the first request that is sent
+    less than `refresh_margin` seconds before the token expires. Concurrent
+    requests share a single refresh. With a `token_store` (e.g.
+    `corenetworks.store.FileTokenStore`) a still valid token of another process
+    is reused instead of a new login. Login requests are sent with `send`
+    (defaults to `session.send`), e.g. to instrument them.
+    """
+
+    def __init__(
+        self,
+        user,
+        password,
+        endpoint,
+        session=None,
+        refresh_margin=60,
+        token_store=None,
+        send=None,
+    ):
         self.user = user
         self.password = password
         self.endpoint = endpoint
-        self.token, self.expires = self._login()
+        self.session = session or Session()
+        self.send = send or self.session.send
+        self.refresh_margin = refresh_margin
+        self.token_store = token_store
+        self._lock = threading.Lock()
+        self.token = None
+        self.expires = None
 
     def __eq__(self, other):  # noqa
         return all([
@@ -32,9 +58,98 @@ class CoreNetworksBasicAuth(AuthBase):
         return not self == other
 
     def __call__(self, r):  # noqa
-        r.headers["Authorization"] = "Bearer {0!s}".format(self.token)
+        token = self.token
+        if token is None:
+            token = self.login()
+        elif self.expired:
+            token = self.refresh(stale_token=token, expired=True)
+
+        r.headers["Authorization"] = "Bearer {0!s}".format(token)
         return r
 
+    @property
+    def expired(self):
+        """Check if the token expires within the refresh margin."""
+        return self.expires is None or self._expiring(self.expires)
+
+    def _expiring(self, expires):
+        margin = datetime.timedelta(seconds=self.refresh_margin)
+        return datetime.datetime.now() + margin >= expires
+
+    def login(self):
+        """
+        Login unless a token was acquired already.
+
+        Concurrent first requests share a single login.
+
+        Returns:
+            str: The current token.
+
+        """
+        with self._lock:
+            if self.token is None:
+                self._replace(*self._acquire())
+
+            return self.token
+
+    def refresh(self, stale_token=None, expired=False):
+        """
+        Login again and replace the current token.
+
+        Args:
+            stale_token (str): Token that is known to be expired or rejected. If another
+                thread has already replaced it, the current token is returned without
+                a new login.
+            expired (bool): The refresh is due to the expiry of the token. The current
+                token is returned without a new login if it no longer expires within
+                the refresh margin.
+
+        Returns:
+            str: The current token.
+
+        """
+        with self._lock:
+            if expired and not self.expired:
+                return self.token
+
+            if stale_token is None or stale_token == self.token:
+                self._replace(*self._acquire(stale_token=self.token))
+
+            return self.token
+
+    def _replace(self, token, expires):
+        # readers check the token before its expiry, a new token must never be seen
+        # together with the expiry of the previous one
+        self.expires = expires
+        self.token = token
+
+    def reauthenticate(self, r):
+        """
+        Refresh the token after a request was rejected and update its headers.
+
+        Returns:
+            bool: `True` if the request can be sent again.
+
+        """
+        stale_token = r.headers.get("Authorization", "").replace("Bearer ", "", 1)
+        token = self.refresh(stale_token=stale_token)
+
+        r.headers["Authorization"] = "Bearer {0!s}".format(token)
+        return True
+
+    def _acquire(self, stale_token=None):
+        if self.token_store is not None:
+            stored = self.token_store.get(self.user, self.password, self.endpoint)
+            if stored and stored[0] != stale_token and not self._expiring(stored[1]):
+                return stored
+
+        token, expires = self._login()
+
+        if self.token_store is not None:
+            self.token_store.put(self.user, self.password, self.endpoint, token, expires)
+
+        return token, expires
+
     def _login(self):
         data = {}
         data["login"] = self.user
@@ -44,11 +159,10 @@ class CoreNetworksBasicAuth(AuthBase):
         url = "{endpoint}/auth/token".format(endpoint=self.endpoint)
 
         request = Request(method="POST", url=url, data=json_data)
-        prepared_request = request.prepare()
+        prepared_request = self.session.prepare_request(request)
 
         try:
-            session = Session()
-            handle = session.send(prepared_request)
+            handle = self.send(prepared_request)
             handle.raise_for_status()
         except HTTPError as e:
             raise AuthError(
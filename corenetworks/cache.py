@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""Local record and response caches."""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from .records import RecordSet
+
+#: Keys of delete parameters that select records, other keys are options of the API.
+RECORD_FIELDS = ("name", "type", "data", "ttl")
+
+#: Record types the provider changes on commit.
+PROVIDER_TYPES = ("SOA",)
+
+
+class RecordCache():
+    """
+    Size bounded LRU cache of full zone record sets.
+
+    Zones are stored as `corenetworks.records.RecordSet` to answer filtered
+    lookups from the indexes instead of scanning all records.
+
+    Entries expire `ttl` seconds after they were stored. If more than `maxsize`
+    zones are cached, the least recently used zone is dropped.
+
+    Every change of a zone increments its version. A record set that was fetched
+    before a concurrent change is not stored, see `version` and `put`.
+    """
+
+    def __init__(self, ttl=60, maxsize=128):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._zones = OrderedDict()
+        self._versions = {}
+        self._lock = threading.RLock()
+
+    def __contains__(self, zone):  # noqa
+        return self.get(zone) is not None
+
+    def __len__(self):  # noqa
+        return len(self._zones)
+
+    def _changed(self, zone):
+        self._versions[zone] = self._versions.get(zone, 0) + 1
+
+    def version(self, zone):
+        """Return the change counter of a zone, pass it to `put` after fetching the zone."""
+        with self._lock:
+            return self._versions.get(zone, 0)
+
+    def get(self, zone):
+        """Return the cached `RecordSet` of a zone or `None` if the zone is not cached."""
+        with self._lock:
+            entry = self._zones.get(zone)
+            if entry is None:
+                return None
+
+            expires, records, _ = entry
+            if expires <= time.monotonic():
+                del self._zones[zone]
+                return None
+
+            self._zones.move_to_end(zone)
+            return records
+
+    def filter(self, zone, params):  # noqa
+        """
+        Get the records of a cached zone that match the filter parameters.
+
+        Returns:
+            list: List of matching API record dictionaries or `None` if the zone
+                is not cached or a matching record is stale, see `expire`.
+
+        """
+        with self._lock:
+            records = self.get(zone)
+            if records is None:
+                return None
+
+            matches = records.filter(params)
+            stale = self._zones[zone][2]
+            if stale and any(r.type in stale for r in matches):
+                return None
+
+            return [r.to_dict() for r in matches]
+
+    def put(self, zone, records, version=None):
+        """
+        Store the full record set of a zone and return the stored `RecordSet`.
+
+        Args:
+            zone (str): Name of the DNS zone.
+            records (list|RecordSet): All records of the zone.
+            version (int): `version` of the zone before the records were fetched. The
+                records are not stored if the zone was changed in the meantime.
+
+        """
+        if not isinstance(records, RecordSet):
+            records = RecordSet(records)
+
+        with self._lock:
+            if version is not None and version != self._versions.get(zone, 0):
+                return records
+
+            self._zones[zone] = (time.monotonic() + self.ttl, records, set())
+            self._zones.move_to_end(zone)
+
+            while len(self._zones) > self.maxsize:
+                self._zones.popitem(last=False)
+
+        return records
+
+    def add(self, zone, record):
+        """Add a created record to a cached zone."""
+        with self._lock:
+            self._changed(zone)
+            records = self.get(zone)
+            if records is not None:
+                records.add(record)
+
+    def discard(self, zone, params):
+        """
+        Remove the records of a cached zone that a delete request with the parameters removes.
+
+        Options of the delete request like `force_all` are ignored. Parameters
+        without any record field or with unknown keys drop the whole zone.
+        """
+        params = dict((k, v) for (k, v) in params.items() if k != "force_all")
+
+        with self._lock:
+            if not params or any(k not in RECORD_FIELDS for k in params):
+                self.invalidate(zone)
+                return
+
+            self._changed(zone)
+            records = self.get(zone)
+            if records is not None:
+                records.discard(params)
+
+    def expire(self, zone, types=PROVIDER_TYPES):
+        """
+        Mark records of a cached zone as stale, e.g. the SOA record after a commit.
+
+        Lookups that match a stale record fetch the zone again, all other lookups
+        are still answered from the cache.
+        """
+        with self._lock:
+            self._changed(zone)
+            entry = self._zones.get(zone)
+            if entry is not None:
+                entry[2].update(types)
+
+    def invalidate(self, zone=None):
+        """Drop a single zone or the whole cache."""
+        with self._lock:
+            if zone is None:
+                for name in list(self._versions):
+                    self._changed(name)
+                self._zones.clear()
+            else:
+                self._changed(zone)
+                self._zones.pop(zone, None)
+
+
+class CachedResponse():
+    """Parsed response of a GET request with its validators."""
+
+    __slots__ = ("etag", "last_modified", "digest", "result")
+
+    def __init__(self, etag, last_modified, digest, result):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.result = result
+
+    @property
+    def headers(self):
+        """Request headers for a conditional request."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache():
+    """
+    Size bounded LRU cache of parsed GET responses keyed by URL.
+
+    Stores the `ETag` and `Last-Modified` validators and a digest of the
+    response body. Responses are revalidated with conditional requests, a `304`
+    or an unchanged body is answered from the cached result without parsing it
+    again.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._responses = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):  # noqa
+        return len(self._responses)
+
+    @staticmethod
+    def digest(content):
+        """Hash a response body."""
+        return hashlib.blake2b(content, digest_size=16).digest()
+
+    def get(self, url):
+        """Return the `CachedResponse` of a URL or `None`."""
+        with self._lock:
+            entry = self._responses.get(url)
+            if entry is not None:
+                self._responses.move_to_end(url)
+            return entry
+
+    def put(self, url, headers, digest, result):
+        """
+        Store a parsed response.
+
+        Args:
+            url (str): Request URL.
+            headers (dict): Response headers.
+            digest (bytes): Digest of the response body, see `digest`.
+            result: Parsed response body.
+
+        """
+        entry = CachedResponse(headers.get("ETag"), headers.get("Last-Modified"), digest, result)
+
+        with self._lock:
+            self._responses[url] = entry
+            self._responses.move_to_end(url)
+
+            while len(self._responses) > self.maxsize:
+                self._responses.popitem(last=False)
+
+        return entry
+
+    def invalidate(self, url=None):
+        """Drop a single URL or the whole cache."""
+        with self._lock:
+            if url is None:
+                self._responses.clear()
+            else:
+                self._responses.pop(url, None)
+
+
+class _Flight():
+    """In-flight call shared by concurrent callers."""
+
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight():
+    """
+    Coalesce concurrent identical calls.
+
+    The first caller of a key runs the call, callers with the same key that
+    arrive while it is in flight wait for it and get its result or exception.
+    Nothing is kept after the call returned.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):  # noqa
+        return len(self._flights)
+
+    def do(self, key, func, copy=None):
+        """
+        Run `func` once for all concurrent callers of a key.
+
+        Args:
+            key: Hashable identity of the call.
+            func (callable): Function without arguments.
+            copy (callable): Optional function to copy a shared result. Every
+                caller of a shared result gets its own copy, the copy of the first
+                caller is made before the waiting callers are released.
+
+        Returns:
+            tuple: Result of the call and whether it was shared with another
+                caller, shared results must be copied before they are modified.
+
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+            else:
+                flight.followers += 1
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result if copy is None else copy(flight.result), True
+
+        try:
+            flight.result = func()
+        except BaseException as e:  # noqa
+            flight.error = e
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+            raise
+
+        # no caller can join once the flight is removed, the number of followers is final
+        with self._lock:
+            del self._flights[key]
+
+        result = flight.result
+        try:
+            if flight.followers > 0 and copy is not None:
+                result = copy(result)
+        finally:
+            flight.done.set()
+
+        return result, flight.followers > 0
@@ -1,135 +1,299 @@
 # -*- coding: utf-8 -*-
 """API  client."""
 
-import copy
 import json
+import logging
 import os
+import threading
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+from contextlib import contextmanager
 
-import jsonschema
 from requests import ConnectionError
 from requests import HTTPError
 from requests import Request
+from requests import RequestException
 from requests import Session
+from requests import Timeout
 from six import iteritems
 
 import corenetworks
 
 from .authenticators import CoreNetworksBasicAuth
 from .authenticators import CoreNetworksTokenAuth
+from .cache import RecordCache
+from .cache import ResponseCache
+from .cache import SingleFlight
 from .exceptions import AuthError
 from .exceptions import CorenetworksError
 from .exceptions import ValidationError
+from .metrics import HOOKS
+from .metrics import MetricsCollector
+from .metrics import RequestEvent
+from .metrics import current_operation
+from .metrics import instrumented
+from .metrics import operation
+from .records import Record
+from .records import RecordSet
+from .records import compile_filter
+from .records import matches_nothing
+from .retry import RetryPolicy
+from .retry import TokenBucket
+from .schema import validation_error
+from .snapshot import Snapshot
+from .snapshot import dump as dump_snapshot
+from .stream import iter_json_items
+from .transport import HTTPTransport
+from .watch import watch as watch_zones
+
+logger = logging.getLogger(__name__)
 
 
 class CoreNetworks():
-    """Create authenticated API client."""
-
-    def __init__(self, user=None, password=None, api_token=None, auto_commit=None):
-        self.__endpoint = "https://beta.api.core-networks.de"
+    """
+    Create authenticated API client.
+
+    A client instance is thread-safe and can be shared between threads. Clients
+    can share the connection pool of an existing `session`, it is not closed by
+    `close` then. A `transport` (see `corenetworks.transport`) replaces the default
+    pooled HTTP transport for all requests to the API endpoint. It is mounted on
+    the session of the client and can not be combined with a shared `session`,
+    mount it on that session instead.
+
+    With `revalidate` the parsed responses of up to `cache_size` GET requests are
+    kept and revalidated with conditional requests (`ETag`, `Last-Modified`).
+    A `304` or an unchanged response body returns the kept result without
+    parsing it again.
+
+    With `coalesce` concurrent identical GET requests, e.g. `records` of the same
+    zone and filter from several threads, share one in-flight request and every
+    caller gets a copy of its result.
+    """
+
+    def __init__(
+        self,
+        user=None,
+        password=None,
+        api_token=None,
+        auto_commit=None,
+        pool_connections=None,
+        pool_maxsize=None,
+        pool_block=None,
+        keep_alive=None,
+        cache_ttl=None,
+        cache_size=None,
+        token_store=None,
+        retry=None,
+        rate_limit=None,
+        commit_delay=None,
+        endpoint=None,
+        hooks=None,
+        metrics=None,
+        session=None,
+        transport=None,
+        revalidate=None,
+        coalesce=None,
+    ):
         self.__user_agent = "Core Networks Python API {version}".format(
             version=corenetworks.__version__
         )
-        self.config = self._config(user, password, api_token, auto_commit)
-
-        self._schema = {
-            "type": "object",
-            "properties": {
-                "name": {
-                    "type": "string"
-                },
-                "ttl": {
-                    "type": "number"
-                },
-                "type": {
-                    "type": "string"
-                },
-                "data": {
-                    "type": "string"
-                },
-            },
-        }
+        self.config = self._config(
+            user,
+            password,
+            api_token,
+            auto_commit,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keep_alive=keep_alive,
+            cache_ttl=cache_ttl,
+            cache_size=cache_size,
+            token_store=token_store,
+            retry=retry,
+            rate_limit=rate_limit,
+            commit_delay=commit_delay,
+            endpoint=endpoint,
+            hooks=hooks,
+            metrics=metrics,
+            transport=transport,
+            revalidate=revalidate,
+            coalesce=coalesce,
+        )
+        self.__endpoint = self.config["endpoint"].rstrip("/")
 
-        self._filter_schema = {
-            "type": "object",
-            "properties": {
-                "name": {
-                    "anyOf": [{
-                        "type": "string",
-                    }, {
-                        "type": "array",
-                        "items": {
-                            "type": "string"
-                        },
-                    }],
-                },
-                "ttl": {
-                    "anyOf": [{
-                        "type": "number",
-                    }, {
-                        "type": "array",
-                        "items": {
-                            "type": "number"
-                        },
-                    }],
-                },
-                "type": {
-                    "anyOf": [{
-                        "type": "string",
-                    }, {
-                        "type": "array",
-                        "items": {
-                            "type": "string"
-                        },
-                    }],
-                },
-                "data": {
-                    "anyOf": [{
-                        "type": "string",
-                    }, {
-                        "type": "array",
-                        "items": {
-                            "type": "string"
-                        },
-                    }],
-                },
-            },
-        }
+        if session is not None and self.config["transport"] is not None:
+            # mounting it would change the transport of every user of the session
+            raise CorenetworksError(
+                "A transport can not be used with a shared session, mount it on the session."
+            )
+
+        self._session = session or self._build_session(self.config)
+        self._owns_session = session is None
+
+        if self.config["transport"] is not None:
+            self._session.mount(self.__endpoint + "/", self.config["transport"])
+        self._cache = None
+        self._responses = None
+        self._flights = None
+        self._rate_limiter = None
+        self._commit_lock = threading.Lock()
+        self._transactions = {}
+        self._pending = set()
+        self._timers = {}
+        self._hooks = dict((event, []) for event in HOOKS)
+        self.metrics = None
+
+        for (event, hooks) in iteritems(self.config["hooks"] or {}):
+            for hook in hooks if isinstance(hooks, (list, tuple)) else [hooks]:
+                self.register_hook(event, hook)
+
+        metrics = self.config["metrics"]
+        if metrics:
+            self.metrics = MetricsCollector() if metrics is True else metrics
+            self.register_hook("after_request", self.metrics)
+
+        retry = self.config["retry"]
+        if retry is True:
+            retry = RetryPolicy()
+        elif retry and isinstance(retry, int):
+            retry = RetryPolicy(total=retry)
+
+        self._retry = retry or None
+
+        if self.config["rate_limit"]:
+            self._rate_limiter = TokenBucket(self.config["rate_limit"])
+
+        if self.config["cache_ttl"]:
+            self._cache = RecordCache(
+                ttl=self.config["cache_ttl"], maxsize=self.config["cache_size"]
+            )
+
+        if self.config["revalidate"]:
+            self._responses = ResponseCache(maxsize=self.config["cache_size"])
+
+        if self.config["coalesce"]:
+            self._flights = SingleFlight()
 
         if self.config["api_token"]:
             self._auth = CoreNetworksTokenAuth(self.config["api_token"])
         else:
             self._auth = CoreNetworksBasicAuth(
-                self.config["user"], self.config["password"], self.__endpoint
+                self.config["user"],
+                self.config["password"],
+                self.__endpoint,
+                session=self._session,
+                token_store=self.config["token_store"],
+                send=self.__send_login,
             )
 
+    def __enter__(self):  # noqa
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):  # noqa
+        self.close()
+
+    def close(self):
+        """Commit pending DNS zones and release all pooled connections."""
+        try:
+            self.flush()
+        finally:
+            if self._owns_session:
+                self._session.close()
+
     @staticmethod
-    def _config(user, password, api_token, auto_commit):
+    def _config(user, password, api_token, auto_commit, **options):
         cfg = defaultdict(
             dict, {
                 "user": None,
                 "password": None,
                 "api_token": None,
-                "auto_commit": False
+                "auto_commit": False,
+                "pool_connections": 10,
+                "pool_maxsize": 10,
+                "pool_block": False,
+                "keep_alive": True,
+                "cache_ttl": None,
+                "cache_size": 128,
+                "token_store": None,
+                "retry": None,
+                "rate_limit": None,
+                "commit_delay": None,
+                "endpoint": "https://beta.api.core-networks.de",
+                "hooks": None,
+                "metrics": None,
+                "transport": None,
+                "revalidate": False,
+                "coalesce": False,
             }
         )
 
         cfg["user"] = os.getenv("CN_API_USER")
         cfg["password"] = os.getenv("CN_API_PASSWORD")
         cfg["api_token"] = os.getenv("CN_API_TOKEN")
+        cfg["endpoint"] = os.getenv("CN_API_ENDPOINT", cfg["endpoint"])
 
         cfg["user"] = user or cfg["user"]
         cfg["password"] = password or cfg["password"]
         cfg["api_token"] = api_token or cfg["api_token"]
         cfg["auto_commit"] = auto_commit or cfg["auto_commit"]
 
+        for key, value in iteritems(options):
+            if value is not None:
+                cfg[key] = value
+
         if not (cfg["user"] and cfg["password"]) and not cfg["api_token"]:
             raise AuthError("Insufficient authentication details provided")
 
         return cfg
 
+    @staticmethod
+    def _build_session(config):
+        """
+        Create the pooled HTTP session shared by all requests of a client.
+
+        `pool_connections` controls the number of cached host pools, `pool_maxsize`
+        the number of connections kept alive per host and `pool_block` whether
+        requests wait for a free connection instead of opening additional ones.
+        """
+        adapter = HTTPTransport(
+            pool_connections=config["pool_connections"],
+            pool_maxsize=config["pool_maxsize"],
+            pool_block=config["pool_block"],
+        )
+
+        session = Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        if not config["keep_alive"]:
+            session.headers["Connection"] = "close"
+
+        return session
+
+    def register_hook(self, event, hook):
+        """
+        Register a request hook.
+
+        `before_request` hooks are called with a `corenetworks.metrics.RequestEvent`
+        before a request is sent and may modify `event.request`, `after_request`
+        hooks are called with the completed event after the response was received
+        or the request failed.
+
+        Args:
+            event (str): Name of the hook, `before_request` or `after_request`.
+            hook (callable): Function that is called with the request event.
+
+        """
+        if event not in self._hooks:
+            raise CorenetworksError("Unknown hook: {event}".format(event=event))
+
+        self._hooks[event].append(hook)
+
     # ZONES
 
+    @instrumented("zones")
     def zones(self):
         """
         Get the list of DNS zones.
@@ -138,10 +302,11 @@ class CoreNetworks():
             list: List of zones.
 
         """
-        result = self.__rest_helper("/dnszones/", method="GET")
+        result = self.__rest_helper("/dnszones/", method="GET", call="zones")
 
         return self.__normalize(result)
 
+    @instrumented("zone")
     def zone(self, zone):
         """
         Get details about a DNS zone.
@@ -153,12 +318,13 @@ class CoreNetworks():
             list: List of zones.
 
         """
-        result = self.__rest_helper("/dnszones/{zone}".format(zone=zone), method="GET")
+        result = self.__rest_helper("/dnszones/{zone}", method="GET", call="zone", zone=zone)
 
         return self.__normalize(result)
 
     # RECORDS
 
+    @instrumented("records")
     def records(self, zone, params={}):
         """
         Get the list of records for the specific domain.
@@ -173,95 +339,339 @@ class CoreNetworks():
                 Example: `params={"type": ["NS", "SOA"]}` will result in
                 `filter=?type[]=NS&type[]=SOA`
 
+                Operators that the API does not support are applied locally, e.g.
+                `params={"name": {"endswith": "-dev"}, "ttl": {"lt": 300}}`.
+                See `corenetworks.records.compile_filter`.
+
+                If the record cache is enabled (`cache_ttl`), the full record set of
+                the zone is fetched once and filters are applied locally.
+
+                An empty list of accepted values, e.g. `params={"name": []}`, matches
+                no record and sends no request.
+
         Returns:
             list: List of matching records.
 
         """
-        schema = copy.deepcopy(self._filter_schema)
-        self.__validate(params, schema)
+        self.__validate(params, "filter")
+
+        if self._cache is not None:
+            records = self._cache.filter(zone, params)
+            if records is None:
+                version = self._cache.version(zone)
+                result = self.__rest_helper(
+                    "/dnszones/{zone}/records/", method="GET", call="records", zone=zone
+                )
+                zone_records = RecordSet(self.__normalize(result))
+                records = [r.to_dict() for r in zone_records.filter(params)]
+                self._cache.put(zone, zone_records, version=version)
+
+            return records
 
-        filter_string = self.__json_to_filter(params)
+        pushdown, predicate = compile_filter(params)
+        if matches_nothing(pushdown):
+            return []
+
+        filter_string = self.__json_to_filter(pushdown)
         result = self.__rest_helper(
-            "/dnszones/{zone}/records/{filter}".format(zone=zone, filter=filter_string),
-            method="GET"
+            "/dnszones/{zone}/records/{filter}",
+            method="GET",
+            call="records",
+            zone=zone,
+            filter=filter_string,
         )
 
-        return self.__normalize(result)
+        records = self.__normalize(result)
+        if predicate is not None:
+            records = [r for r in records if predicate(r)]
+
+        return records
+
+    def iter_records(self, zone, params={}):
+        """
+        Iterate over the records for the specific domain.
+
+        Unlike `records` the response is parsed incrementally while it is
+        received, only a single record is held in memory at a time.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+            params (dict): Dictionary of filter parameters. See `records`.
+
+        Yields:
+            dict: Matching records.
+
+        """
+        self.__validate(params, "filter")
+
+        if self._cache is not None:
+            records = self._cache.filter(zone, params)
+            if records is not None:
+                for r in records:
+                    yield r
+                return
+
+        pushdown, predicate = compile_filter(params)
+        if matches_nothing(pushdown):
+            return
 
-    def add_record(self, zone, params):
+        filter_string = self.__json_to_filter(pushdown)
+        result = self.__rest_helper(
+            "/dnszones/{zone}/records/{filter}",
+            method="GET",
+            stream=True,
+            call="iter_records",
+            zone=zone,
+            filter=filter_string,
+        )
+
+        for r in result:
+            if predicate is None or predicate(r):
+                yield r
+
+    @instrumented("add_record")
+    def add_record(self, zone, params, verify=False):
         """
         Create a record for the given domain.
 
+        The records with the same name are fetched once to resolve CNAME conflicts
+        and TTL updates locally. Nothing is sent if an identical record exists.
+
         Args:
             zone (str): Name of the target DNS zone.
             params (dict): Dictionary of record parameters.
                 See https://beta.api.core-networks.de/doc/#functon_dnszones_records_add
+            verify (bool): Fetch the created record from the API instead of returning
+                it from the request parameters.
+
+        Returns:
+            list: List of added records.
+
+        """
+        self.__validate(params, "add_record")
+
+        current = self.records(zone, params={"name": params["name"]})
+        stale, exists = self.__plan_record(params, RecordSet(current))
+
+        for r in stale:
+            self._delete_record_raw(zone, params=self.__delete_params(r.to_dict()))
+
+        if not exists:
+            self._add_record_raw(zone, params=params)
+
+        if stale or not exists:
+            self.__schedule_commit(zone)
+
+        if verify:
+            return self.records(zone=zone, params=params)
+
+        return [Record.from_dict(params).to_dict()]
+
+    @instrumented("add_records")
+    def add_records(self, zone, records, commit=None):
+        """
+        Create multiple records for the given domain.
+
+        The record set of the zone is fetched once and all CNAME conflict checks and
+        TTL updates are resolved locally, so only the required deletes and creates
+        are sent to the API.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+            records (list): List of record parameter dictionaries.
+                See https://beta.api.core-networks.de/doc/#functon_dnszones_records_add
+            commit (bool): Commit the zone once after all changes are applied.
+                Defaults to the `auto_commit` setting of the client.
 
         Returns:
             list: List of added records.
 
         """
-        schema = copy.deepcopy(self._schema)
-        schema["required"] = ["name", "type", "data", "ttl"]
-        self.__validate(params, schema)
+        for params in records:
+            self.__validate(params, "add_record")
+
+        current = RecordSet(self.records(zone))
+        deletes = []
+        creates = []
+
+        for params in records:
+            stale, exists = self.__plan_record(params, current.filter({"name": params["name"]}))
+
+            for r in stale:
+                current.discard(r.to_dict())
+                if r in creates:
+                    creates.remove(r)
+                else:
+                    deletes.append(r)
+
+            if not exists:
+                creates.append(current.add(params))
+
+        for r in deletes:
+            self._delete_record_raw(zone, params=self.__delete_params(r.to_dict()))
+
+        for r in creates:
+            self._add_record_raw(zone, params=r.to_dict())
+
+        if deletes or creates:
+            self.__schedule_commit(zone, commit)
+
+        return [r.to_dict() for r in creates]
+
+    @instrumented("sync_zone")
+    def sync_zone(self, zone, records, prune=False, dry_run=False, commit=None):
+        """
+        Converge the records of a DNS zone to the desired state.
+
+        The current record set is fetched once and compared locally. Records are
+        identified by name, type and data; a changed TTL is applied by replacing
+        the record. The SOA record and the NS records of the zone apex (`@`) are
+        managed by the provider and never pruned.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+            records (list): List of desired record parameter dictionaries.
+                See https://beta.api.core-networks.de/doc/#functon_dnszones_records_add
+            prune (bool): Delete existing records that are not part of the desired state.
+            dry_run (bool): Only compute the change set without applying it.
+            commit (bool): Commit the zone once after all changes are applied.
+                Defaults to the `auto_commit` setting of the client.
+
+        Returns:
+            dict: Change set with the lists of records to `delete` and to `add`.
+
+        """
+        for params in records:
+            self.__validate(params, "add_record")
+
+        current = self.records(zone)
+        changes = self.__diff_records(current, records, prune)
+
+        if dry_run:
+            return changes
+
+        for r in changes["delete"]:
+            self._delete_record_raw(zone, params=self.__delete_params(r))
+
+        for r in changes["add"]:
+            self._add_record_raw(zone, params=r)
+
+        if changes["delete"] or changes["add"]:
+            self.__schedule_commit(zone, commit)
+
+        return changes
+
+    @staticmethod
+    def __diff_records(current, desired, prune):
+        """Compute the minimal change set between two record lists."""
+
+        def key(r):
+            return (r["name"], r["type"], r["data"])
+
+        wanted = dict((key(r), r) for r in desired)
+        existing = dict((key(r), r) for r in current)
+
+        changes = {"delete": [], "add": []}
+        for k, r in iteritems(existing):
+            if k in wanted:
+                if int(r["ttl"]) != int(wanted[k]["ttl"]):
+                    changes["delete"].append(r)
+            elif prune and not (r["type"] == "SOA" or (r["type"] == "NS" and r["name"] == "@")):
+                changes["delete"].append(r)
+
+        for k, r in iteritems(wanted):
+            if k not in existing or int(existing[k]["ttl"]) != int(r["ttl"]):
+                changes["add"].append(r)
+
+        return changes
+
+    @staticmethod
+    def __delete_params(record):
+        """Parameters to delete an existing record, the API returns the TTL as string."""
+        return dict(record, ttl=int(record["ttl"]))
+
+    @staticmethod
+    def __plan_record(params, records):
+        """
+        Resolve the changes required to add a record against existing records.
 
+        Args:
+            params (dict): Dictionary of record parameters.
+            records (list): Existing `Record` objects with the same name.
+
+        Returns:
+            tuple: List of existing records that have to be deleted and a flag that
+                indicates whether an identical record already exists.
+
+        """
         if params["type"] == "CNAME":
             if params["name"] == "@":
                 raise CorenetworksError("CNAME records are not allowed for the zone itself.")
 
-        records = self.records(zone, params={"name": params["name"]})
+        stale = []
+        duplicates = []
         for r in records:
-            if params["type"] == "CNAME" and r["type"] != "CNAME":
+            if params["type"] == "CNAME" and r.type != "CNAME":
                 raise CorenetworksError(
                     "A record with the same name already exist ({name}). "
                     "CNAME records cannot use the same name with other records.".format(
-                        name=r["name"]
+                        name=r.name
                     )
                 )
-            if params["type"] != "CNAME" and r["type"] == "CNAME":
+            if params["type"] != "CNAME" and r.type == "CNAME":
                 raise CorenetworksError(
                     "A CNAME record with the same name already exist ({name}). "
                     "CNAME records cannot use the same name with other records.".format(
-                        name=r["name"]
+                        name=r.name
                     )
                 )
-            if params["type"] == "CNAME" and r["data"] != params["data"]:
-                self._delete_record_raw(zone, params=r)
+            if params["type"] == "CNAME" and r.data != params["data"]:
+                stale.append(r)
+            elif r.type == params["type"] and r.data == params["data"]:
+                duplicates.append(r)
 
-        curr = copy.deepcopy(params)
-        curr.pop("ttl")
-        records = self.records(zone, curr)
-
-        if len(records) > 1:
+        if len(duplicates) > 1:
             raise CorenetworksError(
                 "More than one record already exists for the given attributes. "
                 "That should be impossible, please open an issue!"
             )
 
         # delete existing record with different ttl for a fake update
-        for r in records:
-            r["ttl"] = int(r["ttl"])
-            if r["ttl"] != params["ttl"]:
-                self._delete_record_raw(zone, params=r)
+        exists = False
+        for r in duplicates:
+            if int(r.ttl) != params["ttl"]:
+                stale.append(r)
+            else:
+                exists = True
 
-        self.__rest_helper(
-            "/dnszones/{zone}/records/".format(zone=zone), data=params, method="POST"
-        )
+        return stale, exists
 
-        result = self.records(zone=zone, params=params)
+    def _add_record_raw(self, zone, params):
+        r = self.__rest_helper(
+            "/dnszones/{zone}/records/", data=params, method="POST", call="add_record", zone=zone
+        )
 
-        if self.config["auto_commit"]:
-            self.commit(zone=zone)
+        if self._cache is not None:
+            self._cache.add(zone, params)
 
-        return self.__normalize(result)
+        return r
 
     def _delete_record_raw(self, zone, params):
         r = self.__rest_helper(
-            "/dnszones/{zone}/records/delete".format(zone=zone), data=params, method="POST"
+            "/dnszones/{zone}/records/delete",
+            data=params,
+            method="POST",
+            idempotent=True,
+            call="delete_record",
+            zone=zone,
         )
 
+        if self._cache is not None:
+            self._cache.discard(zone, params)
+
         return r
 
+    @instrumented("delete_record")
     def delete_record(self, zone, params):
         """
         Delete all DNS records of a zone that match the data.
@@ -275,29 +685,18 @@ class CoreNetworks():
             list: Empty list.
 
         """
-        schema = copy.deepcopy(self._schema)
-        schema["properties"]["force_all"] = {"type": "boolean"}
-        schema["anyOf"] = [{
-            "required": ["name"]
-        }, {
-            "required": ["type"]
-        }, {
-            "required": ["data"]
-        }, {
-            "required": ["force_all"]
-        }]
-        self.__validate(params, schema)
+        self.__validate(params, "delete_record")
 
         if params.get("force_all"):
             params = {}
 
         result = self._delete_record_raw(zone, params)
 
-        if self.config["auto_commit"]:
-            self.commit(zone=zone)
+        self.__schedule_commit(zone)
 
         return self.__normalize(result)
 
+    @instrumented("commit")
     def commit(self, zone):
         """
         Commit changed records to the given DNS zone.
@@ -309,15 +708,349 @@ class CoreNetworks():
             list: Empty list.
 
         """
-        result = self.__rest_helper(
-            "/dnszones/{zone}/records/commit".format(zone=zone), method="POST"
-        )
+        pending = self.__clear_pending_commit(zone)
+
+        try:
+            result = self.__rest_helper(
+                "/dnszones/{zone}/records/commit",
+                method="POST",
+                idempotent=True,
+                call="commit",
+                zone=zone,
+            )
+        except (CorenetworksError, RequestException):
+            # the changes are still uncommitted, keep the zone for the next flush
+            if pending:
+                with self._commit_lock:
+                    self._pending.add(zone)
+            raise
+
+        # a commit updates provider managed records like the SOA serial
+        if self._cache is not None:
+            self._cache.expire(zone)
 
         return self.__normalize(result)
 
-    def __rest_helper(self, url, data=None, params=None, method="GET"):
-        """Handle requests to the Core Networks API."""
-        url = self.__endpoint + url
+    @contextmanager
+    def transaction(self, zone):
+        """
+        Coalesce all commits of a DNS zone into a single commit.
+
+        Record changes inside the block only mark the zone as changed, it is
+        committed once when the outermost block for the zone exits without an
+        exception. After an exception the zone stays pending until `flush`.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+
+        """
+        with self._commit_lock:
+            self._transactions[zone] = self._transactions.get(zone, 0) + 1
+
+        try:
+            yield self
+        finally:
+            with self._commit_lock:
+                self._transactions[zone] -= 1
+                done = not self._transactions[zone]
+                if done:
+                    del self._transactions[zone]
+
+        if done:
+            self.flush(zone)
+
+    @instrumented("flush")
+    def flush(self, zone=None):
+        """
+        Commit pending DNS zones immediately.
+
+        Args:
+            zone (str): Name of the DNS zone to commit. Defaults to all pending zones.
+
+        Returns:
+            list: Names of the committed zones.
+
+        """
+        with self._commit_lock:
+            if zone is None:
+                zones = sorted(self._pending)
+            else:
+                zones = [zone] if zone in self._pending else []
+
+        for name in zones:
+            self.commit(zone=name)
+
+        return zones
+
+    def __schedule_commit(self, zone, commit=None):
+        """
+        Commit a changed DNS zone according to the commit settings.
+
+        Inside a `transaction` the zone is only marked as pending. With a
+        `commit_delay` the commit is debounced and sent once no further change
+        happened for the configured number of seconds.
+        """
+        with self._commit_lock:
+            if self._transactions.get(zone) and commit is not False:
+                self._pending.add(zone)
+                return
+
+            if commit is None:
+                commit = self.config["auto_commit"]
+
+            if not commit:
+                return
+
+            delay = self.config["commit_delay"]
+            if delay:
+                self._pending.add(zone)
+
+                timer = self._timers.pop(zone, None)
+                if timer is not None:
+                    timer.cancel()
+
+                timer = self._timers[zone] = threading.Timer(
+                    delay, self.__delayed_flush, args=(zone,)
+                )
+                timer.daemon = True
+                timer.start()
+                return
+
+        self.commit(zone=zone)
+
+    def __clear_pending_commit(self, zone):
+        with self._commit_lock:
+            pending = zone in self._pending
+            self._pending.discard(zone)
+
+            timer = self._timers.pop(zone, None)
+            if timer is not None:
+                timer.cancel()
+
+        return pending
+
+    def __delayed_flush(self, zone):
+        """Send a debounced commit, a failed commit leaves the zone pending."""
+        try:
+            self.flush(zone)
+        except (CorenetworksError, RequestException):
+            logger.warning(
+                "Delayed commit of %s failed, the zone stays pending", zone, exc_info=True
+            )
+
+    # BULK
+
+    def map_zones(self, func, zones, max_workers=None):
+        """
+        Run a function for multiple DNS zones in parallel.
+
+        The client is thread-safe, all workers share its connection pool and
+        authentication state.
+
+        Args:
+            func (callable): Function that is called with the zone name.
+            zones (list): Names of the target DNS zones.
+            max_workers (int): Number of worker threads. Defaults to the
+                `pool_maxsize` of the client.
+
+        Returns:
+            tuple: Dictionary of results and dictionary of raised exceptions,
+                both keyed by zone name.
+
+        """
+        zones = list(zones)
+        results = {}
+        errors = {}
+
+        if not zones:
+            return results, errors
+
+        # attribute the requests of the workers to the operation of the caller
+        name = current_operation()
+
+        def run(zone):
+            with operation(name):
+                return func(zone)
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.config["pool_maxsize"]) as pool:
+            futures = dict((pool.submit(run, zone), zone) for zone in zones)
+
+            for future in as_completed(futures):
+                zone = futures[future]
+                try:
+                    results[zone] = future.result()
+                except Exception as e:  # noqa
+                    errors[zone] = e
+
+        return results, errors
+
+    @instrumented("records_many")
+    def records_many(self, zones, params={}, max_workers=None):
+        """
+        Get the records of multiple DNS zones in parallel.
+
+        Args:
+            zones (list): Names of the target DNS zones.
+            params (dict): Dictionary of filter parameters applied to every zone.
+            max_workers (int): Number of worker threads.
+
+        Returns:
+            tuple: Dictionary of record lists and dictionary of raised exceptions,
+                both keyed by zone name.
+
+        """
+        return self.map_zones(
+            lambda zone: self.records(zone, params), zones, max_workers=max_workers
+        )
+
+    @instrumented("commit_many")
+    def commit_many(self, zones, max_workers=None):
+        """
+        Commit multiple DNS zones in parallel.
+
+        Args:
+            zones (list): Names of the target DNS zones.
+            max_workers (int): Number of worker threads.
+
+        Returns:
+            tuple: Dictionary of commit results and dictionary of raised exceptions,
+                both keyed by zone name.
+
+        """
+        return self.map_zones(lambda zone: self.commit(zone), zones, max_workers=max_workers)
+
+    # SNAPSHOTS
+
+    @instrumented("snapshot")
+    def snapshot(self, path, zones=None, compress=False, max_workers=None):
+        """
+        Export zones and all their records into a snapshot file.
+
+        Args:
+            path (str): Target file, see `corenetworks.snapshot.dump`.
+            zones (list): Names of the DNS zones to export. Defaults to all zones.
+            compress (bool): Compress the snapshot.
+            max_workers (int): Number of worker threads used to fetch the records.
+
+        Returns:
+            list: Names of the exported zones.
+
+        """
+        all_zones = self.zones()
+        if zones is not None:
+            all_zones = [z for z in all_zones if z["name"] in zones]
+
+        names = [z["name"] for z in all_zones]
+        records, errors = self.records_many(names, max_workers=max_workers)
+
+        for name in names:
+            if name in errors:
+                raise errors[name]
+
+        dump_snapshot(path, all_zones, records, compress=compress)
+
+        return names
+
+    def load_snapshot(self, source):
+        """
+        Load the records of a snapshot into the record cache.
+
+        Subsequent `records` calls for the zones of the snapshot are answered
+        locally until the cache entries expire or are invalidated by a commit.
+
+        Args:
+            source (str|Snapshot): Path of a snapshot file or a loaded snapshot.
+
+        Returns:
+            list: Names of the loaded zones.
+
+        """
+        if self._cache is None:
+            raise CorenetworksError("Record cache is disabled, set `cache_ttl` to load snapshots.")
+
+        if isinstance(source, Snapshot):
+            names = source.zone_names
+            for name in names:
+                self._cache.put(name, source.record_set(name))
+        else:
+            with Snapshot(source) as snap:
+                names = self.load_snapshot(snap)
+
+        return names
+
+    # WATCH
+
+    def watch(
+        self,
+        zones=None,
+        interval=60,
+        max_interval=None,
+        max_workers=None,
+        initial=False,
+        stop=None,
+    ):
+        """
+        Poll DNS zones and yield record-level changes.
+
+        The first polls of the zones are spread over one interval and at most
+        `max_workers` zones are polled at once. Every poll is compared against the
+        previous records of the zone, zones without changes are polled less often
+        up to `max_interval`, a change resets the zone to `interval`. Combine with
+        `revalidate` to skip the transfer of unchanged zones.
+
+        Args:
+            zones (list): Names of the DNS zones to watch. Defaults to all zones.
+            interval (float): Seconds between two polls of a zone.
+            max_interval (float): Upper limit of the interval for zones without
+                changes. Defaults to `interval`, i.e. a fixed interval.
+            max_workers (int): Number of zones polled at once. Defaults to the
+                `pool_maxsize` of the client.
+            initial (bool): Yield the records of the first poll as added records.
+            stop (threading.Event): Event that ends the generator.
+
+        Yields:
+            dict: The `zone` and lists of `added`, `removed` and `changed` records,
+                every changed record is a dictionary of the `old` and the `new`
+                record. A failed poll yields the `zone` and the `error`.
+
+        """
+        return watch_zones(
+            self,
+            zones=zones,
+            interval=interval,
+            max_interval=max_interval,
+            max_workers=max_workers,
+            initial=initial,
+            stop=stop,
+        )
+
+    def __rest_helper(
+        self,
+        path,
+        data=None,
+        params=None,
+        method="GET",
+        idempotent=None,
+        stream=False,
+        call=None,
+        **path_params
+    ):
+        """
+        Handle requests to the Core Networks API.
+
+        GET requests are considered idempotent, other methods only if
+        `idempotent` is set explicitly. Only idempotent requests are retried
+        after connection errors and server errors. With `stream` the response
+        body is not parsed, an iterator over the items of the JSON response is
+        returned instead.
+
+        `path` is a template that is formatted with `path_params`, the template
+        and the `call` name are passed to the request hooks.
+        """
+        if idempotent is None:
+            idempotent = method == "GET"
+
+        url = self.__endpoint + path.format(**path_params)
         headers = {
             "User-Agent": self.__user_agent,
             "Accept": "application/json",
@@ -338,21 +1071,140 @@ class CoreNetworks():
             auth=self._auth
         )
 
-        prepared_request = request.prepare()
+        prepared_request = self._session.prepare_request(request)
+
+        if self._flights is None or method != "GET" or stream:
+            return self.__dispatch(prepared_request, path, call, idempotent, stream)
 
-        r_json, r_headers = self.__request_helper(prepared_request)
+        # concurrent identical reads share one request, the URL includes the filter string
+        result, _ = self._flights.do(
+            (method, prepared_request.url),
+            lambda: self.__dispatch(prepared_request, path, call, idempotent, stream),
+            copy=self.__copy_result,
+        )
+
+        return result
+
+    def __dispatch(self, prepared_request, path, call, idempotent, stream):
+        """Send a prepared request with revalidation and request hooks."""
+        method = prepared_request.method
+        revalidate = self._responses is not None and method == "GET" and not stream
+        cached = None
+        if revalidate:
+            cached = self._responses.get(prepared_request.url)
+            if cached is not None:
+                prepared_request.headers.update(cached.headers)
+
+        if not (self._hooks["before_request"] or self._hooks["after_request"]):
+            r_json, r_headers = self.__request_helper(
+                prepared_request, idempotent, stream, revalidate=revalidate, cached=cached
+            )
+            return r_json
+
+        event = RequestEvent(
+            current_operation() or call,
+            call,
+            method,
+            path,
+            prepared_request.url,
+            request=prepared_request,
+        )
+        for hook in self._hooks["before_request"]:
+            hook(event)
+
+        start = time.monotonic()
+        try:
+            r_json, r_headers = self.__request_helper(
+                event.request,
+                idempotent,
+                stream,
+                event=event,
+                revalidate=revalidate,
+                cached=cached,
+            )
+        except (CorenetworksError, RequestException) as e:
+            event.error = e
+            raise
+        finally:
+            event.latency = time.monotonic() - start
+            for hook in self._hooks["after_request"]:
+                hook(event)
 
         return r_json
 
-    @staticmethod
-    def __request_helper(request):
+    def __send_login(self, request):
+        """Send a login request and pass it to the request hooks as `login` operation."""
+        if not (self._hooks["before_request"] or self._hooks["after_request"]):
+            return self._session.send(request)
+
+        event = RequestEvent(
+            "login", "login", request.method, "/auth/token", request.url, request=request
+        )
+        for hook in self._hooks["before_request"]:
+            hook(event)
+
+        start = time.monotonic()
+        try:
+            handle = self._session.send(event.request)
+            event.status = handle.status_code
+            event.bytes_received = len(handle.content)
+        except RequestException as e:
+            event.error = e
+            raise
+        finally:
+            event.latency = time.monotonic() - start
+            for hook in self._hooks["after_request"]:
+                hook(event)
+
+        return handle
+
+    def __send(self, request, idempotent, stream=False, event=None):
+        """Send a request and apply the retry and rate limit policies."""
+        attempt = 0
+
+        while True:
+            if self._rate_limiter is not None:
+                self._rate_limiter.acquire()
+
+            can_retry = self._retry is not None and attempt < self._retry.total
+
+            try:
+                handle = self._session.send(request, stream=stream)
+            except (ConnectionError, Timeout):
+                if not (can_retry and idempotent):
+                    raise
+
+                self._retry.sleep(attempt)
+                attempt += 1
+                continue
+
+            # retry once with a new token if the current one was rejected
+            reauthenticate = getattr(self._auth, "reauthenticate", None)
+            if handle.status_code == 401 and reauthenticate and reauthenticate(request):
+                handle.close()
+                handle = self._session.send(request, stream=stream)
+
+            if event is not None:
+                event.status = handle.status_code
+                event.retries = attempt
+
+            if can_retry and self._retry.is_retryable(handle.status_code, idempotent):
+                handle.close()
+                self._retry.sleep(attempt, handle)
+                attempt += 1
+                continue
+
+            return handle
+
+    def __request_helper(
+        self, request, idempotent=False, stream=False, event=None, revalidate=False, cached=None
+    ):
         """Handle firing off requests and exception raising."""
         try:
-            session = Session()
-            handle = session.send(request)
-
+            handle = self.__send(request, idempotent, stream, event)
             handle.raise_for_status()
         except HTTPError as e:
+            e.response.close()
             raise CorenetworksError(
                 "Invalid response: {code} {reason}".format(
                     code=e.response.status_code, reason=e.response.reason
@@ -362,17 +1214,63 @@ class CoreNetworks():
         except ConnectionError:
             raise
 
-        if handle.status_code == 200:
+        if stream:
+            response = self.__stream_helper(handle)
+        elif handle.status_code == 304 and cached is not None:
+            response = self.__copy_result(cached.result)
+        elif handle.status_code == 200 and revalidate:
+            response = self.__revalidate(request, handle, cached)
+        elif handle.status_code == 200:
             response = handle.json()
         else:
             response = []
 
+        if event is not None:
+            length = handle.headers.get("Content-Length")
+            if not stream:
+                event.bytes_received = len(handle.content)
+            elif length and length.isdigit():
+                event.bytes_received = int(length)
+
         return response, handle.headers
 
+    def __revalidate(self, request, handle, cached):
+        """Parse a response unless its body is unchanged and keep it for revalidation."""
+        digest = self._responses.digest(handle.content)
+
+        if cached is not None and cached.digest == digest:
+            result = cached.result
+        else:
+            result = handle.json()
+
+        self._responses.put(request.url, handle.headers, digest, result)
+
+        return self.__copy_result(result)
+
+    @staticmethod
+    def __copy_result(result):
+        """Copy a kept result so callers cannot modify it."""
+        if isinstance(result, list):
+            return [dict(r) if isinstance(r, dict) else r for r in result]
+        elif isinstance(result, dict):
+            return dict(result)
+
+        return result
+
+    @staticmethod
+    def __stream_helper(handle):
+        """Parse the items of a streamed response and release the connection afterwards."""
+        try:
+            if handle.status_code == 200:
+                for item in iter_json_items(handle.iter_content(chunk_size=65536)):
+                    yield item
+        finally:
+            handle.close()
+
     @staticmethod
     def __normalize(result):
         if isinstance(result, list):
-            return [el for el in result]
+            return result
         elif isinstance(result, dict):
             return [result]
         else:
@@ -400,7 +1298,9 @@ class CoreNetworks():
 
     @staticmethod
     def __validate(data, schema):
-        try:
-            jsonschema.validate(data, schema)
-        except jsonschema.exceptions.ValidationError as e:
-            raise ValidationError("Dataset invalid: {reason}".format(reason=e.message), payload=e)
+        error = validation_error(data, schema)
+
+        if error is not None:
+            raise ValidationError(
+                "Dataset invalid: {reason}".format(reason=error.message), payload=error
+            )
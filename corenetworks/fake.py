@@ -0,0 +1,441 @@
+# -*- coding: utf-8 -*-
+"""Local stand-in for the Core Networks API."""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+from socketserver import ThreadingMixIn
+
+from six.moves.urllib.parse import parse_qs
+from six.moves.urllib.parse import unquote
+from six.moves.urllib.parse import urlsplit
+
+from .records import match_record
+from .retry import TokenBucket
+from .transport import MemoryTransport
+
+_ZONE_PATH = re.compile(r"^/dnszones/(?P<zone>[^/]+)(?P<rest>/.*)?$")
+
+
+class FakeBackend():
+    """
+    In-memory implementation of the Core Networks API.
+
+    Implements login, zone listing and details, record listing with filters,
+    record creation and deletion and commits. Latency, random server errors and
+    a server side rate limit can be configured to load test a client.
+
+    Args:
+        latency (float): Seconds every request is delayed.
+        jitter (float): Maximum random seconds added to the latency.
+        error_rate (float): Probability of a request failing with `error_status`.
+        error_status (int): HTTP status of injected errors.
+        rate_limit (float): Allowed requests per second, excess requests get HTTP 429.
+        token_ttl (int): Lifetime of issued tokens in seconds.
+        seed (int): Seed for the random error and latency generator.
+
+    """
+
+    def __init__(
+        self,
+        latency=0,
+        jitter=0,
+        error_rate=0,
+        error_status=503,
+        rate_limit=None,
+        token_ttl=3600,
+        seed=None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_ttl = token_ttl
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.requests = []
+
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._users = {}
+        self._tokens = {}
+        self._zones = {}
+        self._injected = []
+
+    def add_user(self, login, password):
+        """Allow a login with the given credentials."""
+        with self._lock:
+            self._users[login] = password
+
+    def add_token(self, token, expires=None):
+        """Register a static API token."""
+        with self._lock:
+            self._tokens[token] = expires
+
+    def add_zone(self, name, records=None, zone_type="master"):
+        """
+        Create a DNS zone with SOA and NS records.
+
+        Args:
+            name (str): Name of the DNS zone.
+            records (list): Additional records of the zone.
+            zone_type (str): Type of the zone.
+
+        """
+        with self._lock:
+            self._zones[name] = {
+                "name": name,
+                "type": zone_type,
+                "serial": 1,
+                "records": [],
+                "commits": 0,
+            }
+            self._update_soa(name)
+            for ns in ("ns1.core-networks.de.", "ns2.core-networks.eu.", "ns3.core-networks.com."):
+                self._add(name, {"name": "@", "ttl": 86400, "type": "NS", "data": ns})
+            for record in records or []:
+                self._add(name, record)
+
+    def records(self, zone):
+        """Get a copy of all records of a zone."""
+        with self._lock:
+            return [dict(r) for r in self._zones[zone]["records"]]
+
+    def commits(self, zone):
+        """Get the number of commits of a zone."""
+        with self._lock:
+            return self._zones[zone]["commits"]
+
+    def inject_errors(self, count=1, status=None):
+        """Fail the next `count` requests with the given HTTP status."""
+        with self._lock:
+            self._injected.extend([status or self.error_status] * count)
+
+    def handle(self, method, url, headers=None, body=None):
+        """
+        Handle a single API request.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request path including the query string.
+            headers (dict): Request headers.
+            body (bytes): Request body.
+
+        Returns:
+            tuple: Status code, response headers and response body.
+
+        """
+        headers = dict((k.lower(), v) for k, v in (headers or {}).items())
+        status, response_headers, payload = self._handle(method, url, headers, body)
+
+        # successful reads carry an ETag and support conditional requests
+        if method == "GET" and status == 200:
+            etag = '"{digest}"'.format(digest=hashlib.sha256(payload).hexdigest()[:32])
+            response_headers["ETag"] = etag
+            if headers.get("if-none-match") == etag:
+                return 304, {"ETag": etag}, b""
+
+        return status, response_headers, payload
+
+    def _handle(self, method, url, headers, body):
+        parts = urlsplit(url)
+        path = unquote(parts.path)
+
+        with self._lock:
+            self.requests.append((method, url))
+            injected = self._injected.pop(0) if self._injected else None
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if self.rate_limiter is not None:
+            wait = self.rate_limiter.try_acquire()
+            if wait:
+                return self._response(
+                    429, {"error": "Too many requests"},
+                    {"Retry-After": str(int(math.ceil(wait)))}
+                )
+
+        if injected is None and self.error_rate and self._random.random() < self.error_rate:
+            injected = self.error_status
+
+        if injected is not None:
+            return self._response(injected, {"error": "Injected error"})
+
+        try:
+            data = json.loads(body.decode("utf-8")) if body else {}
+        except ValueError:
+            return self._response(400, {"error": "Invalid JSON"})
+
+        if method == "POST" and path == "/auth/token":
+            return self._login(data)
+
+        if not self._authorized(headers.get("authorization", "")):
+            return self._response(401, {"error": "Unauthorized"})
+
+        if method == "GET" and path == "/dnszones/":
+            with self._lock:
+                zones = [{"name": z["name"], "type": z["type"]} for z in self._zones.values()]
+            return self._response(200, zones)
+
+        match = _ZONE_PATH.match(path)
+        if not match:
+            return self._response(404, {"error": "Not found"})
+
+        zone = match.group("zone")
+        rest = match.group("rest") or ""
+
+        with self._lock:
+            if zone not in self._zones:
+                return self._response(404, {"error": "Zone not found"})
+
+            if method == "GET" and rest == "":
+                return self._response(200, self._details(zone))
+            if method == "GET" and rest == "/records/":
+                return self._response(200, self._list(zone, parts.query))
+            if method == "POST" and rest == "/records/":
+                return self._create(zone, data)
+            if method == "POST" and rest == "/records/delete":
+                self._delete(zone, data)
+                return self._response(204)
+            if method == "POST" and rest == "/records/commit":
+                self._zones[zone]["serial"] += 1
+                self._zones[zone]["commits"] += 1
+                self._update_soa(zone)
+                return self._response(204)
+
+        return self._response(404, {"error": "Not found"})
+
+    @staticmethod
+    def _response(status, payload=None, headers=None):
+        headers = dict(headers or {})
+        body = b""
+
+        if payload is not None and status != 204:
+            body = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+
+        return status, headers, body
+
+    def _login(self, data):
+        with self._lock:
+            login = data.get("login")
+            if login not in self._users or self._users[login] != data.get("password"):
+                return self._response(401, {"error": "Invalid credentials"})
+
+            token = uuid.uuid4().hex
+            self._tokens[token] = time.time() + self.token_ttl
+
+        return self._response(200, {"token": token, "expires": self.token_ttl})
+
+    def _authorized(self, header):
+        if not header.startswith("Bearer "):
+            return False
+
+        with self._lock:
+            token = header[len("Bearer "):]
+            if token not in self._tokens:
+                return False
+
+            expires = self._tokens[token]
+            return expires is None or expires > time.time()
+
+    def _details(self, zone):
+        return {
+            "active": True,
+            "dnssec": False,
+            "master": None,
+            "name": zone,
+            "tsig": None,
+            "type": self._zones[zone]["type"],
+        }
+
+    def _list(self, zone, query):
+        params = {}
+        for (key, values) in parse_qs(query).items():
+            key = key.replace("[]", "")
+            params[key] = values
+
+        return [
+            dict(r, ttl=str(r["ttl"]))
+            for r in self._zones[zone]["records"]
+            if match_record(r, params)
+        ]
+
+    def _create(self, zone, data):
+        required = ("name", "ttl", "type", "data")
+        if any(k not in data for k in required):
+            return self._response(400, {"error": "Missing record attributes"})
+
+        records = self._zones[zone]["records"]
+        if not any(match_record(r, data) for r in records):
+            self._add(zone, data)
+
+        return self._response(204)
+
+    def _add(self, zone, record):
+        self._zones[zone]["records"].append({
+            "name": record["name"],
+            "ttl": int(record["ttl"]),
+            "type": record["type"],
+            "data": record["data"],
+        })
+
+    def _delete(self, zone, data):
+        params = dict((k, data[k]) for k in ("name", "ttl", "type", "data") if k in data)
+        self._zones[zone]["records"] = [
+            r for r in self._zones[zone]["records"]
+            if r["type"] == "SOA" or not match_record(r, params)
+        ]
+
+    def _update_soa(self, zone):
+        records = [r for r in self._zones[zone]["records"] if r["type"] != "SOA"]
+        records.insert(
+            0, {
+                "name": "@",
+                "ttl": 1800,
+                "type": "SOA",
+                "data":
+                    "ns1.core-networks.de. hostmaster.core-networks.de. {serial} "
+                    "28800 7200 604800 1800".format(serial=self._zones[zone]["serial"]),
+            }
+        )
+        self._zones[zone]["records"] = records
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _dispatch(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else None
+
+        status, headers, payload = self.server.backend.handle(
+            self.command, self.path, dict(self.headers.items()), body
+        )
+
+        self.send_response(status)
+        for (key, value) in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _dispatch  # noqa
+    do_POST = _dispatch  # noqa
+
+    def log_message(self, format, *args):  # noqa
+        pass
+
+
+class FakeAdapter(MemoryTransport):
+    """
+    Transport adapter that sends requests to a `FakeBackend` in-process.
+
+    Mount it on a `requests.Session` to exercise a client without sockets or
+    HTTP parsing, e.g. to measure the overhead of the client itself.
+
+    Example:
+        backend = FakeBackend()
+        session.mount("http://fake", FakeAdapter(backend))
+
+    """
+
+    def __init__(self, backend):
+        super(FakeAdapter, self).__init__(backend)
+
+
+class FakeServer():
+    """
+    Serve a `FakeBackend` over HTTP on a local port.
+
+    Example:
+        with FakeServer() as server:
+            server.backend.add_user("user", "password")
+            server.backend.add_zone("example.com")
+
+            client = CoreNetworks("user", "password", endpoint=server.endpoint)
+
+    """
+
+    def __init__(self, backend=None, host="127.0.0.1", port=0, **options):
+        self.backend = backend or FakeBackend(**options)
+        self._server = _ThreadingHTTPServer((host, port), _RequestHandler)
+        self._server.backend = self.backend
+        self._thread = None
+
+    def __enter__(self):  # noqa
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):  # noqa
+        self.stop()
+
+    @property
+    def endpoint(self):
+        host, port = self._server.server_address[:2]
+        return "http://{host}:{port}".format(host=host, port=port)
+
+    def start(self):
+        """Start serving requests in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server and close its socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the Core Networks API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--user", default="user")
+    parser.add_argument("--password", default="password")
+    parser.add_argument("--zone", action="append", default=[], help="zone to create")
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    options = parser.parse_args(args)
+
+    backend = FakeBackend(
+        latency=options.latency,
+        jitter=options.jitter,
+        error_rate=options.error_rate,
+        rate_limit=options.rate_limit,
+    )
+    backend.add_user(options.user, options.password)
+    for zone in options.zone or ["example.com"]:
+        backend.add_zone(zone)
+
+    server = FakeServer(backend, host=options.host, port=options.port)
+    print("Serving fake Core Networks API on {endpoint}".format(endpoint=server.endpoint))
+
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""Request instrumentation and metrics."""
+
+import bisect
+import functools
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+HOOKS = ("before_request", "after_request")
+
+#: Upper bounds of the latency histogram buckets in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, float("inf"))
+
+_context = threading.local()
+
+
+@contextmanager
+def operation(name):
+    """
+    Attribute all requests sent by the current thread inside the block to an operation.
+
+    Operations can be nested, requests are attributed to the outermost one.
+
+    Args:
+        name (str): Name of the operation, e.g. `add_record`.
+
+    """
+    stack = getattr(_context, "operations", None)
+    if stack is None:
+        stack = _context.operations = []
+
+    stack.append(name)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+def current_operation():
+    """Get the outermost operation of the current thread or `None`."""
+    for name in getattr(_context, "operations", None) or ():
+        if name is not None:
+            return name
+
+    return None
+
+
+def instrumented(name):
+    """Decorate a client method to run it as named `operation`."""
+
+    def decorator(func):
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with operation(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class RequestEvent():
+    """
+    Details about a single API request passed to the request hooks.
+
+    Attributes:
+        operation (str): Public client operation that caused the request, e.g.
+            `add_record` for the record lookups done by `add_record`.
+        call (str): Client call that sent the request, e.g. `records`.
+        method (str): HTTP method.
+        path (str): Path template of the request, e.g. `/dnszones/{zone}/records/`.
+        url (str): Full request URL.
+        request (requests.PreparedRequest): The request, hooks in `before_request`
+            may modify it.
+        status (int): HTTP status of the final response or `None` if no response
+            was received.
+        bytes_sent (int): Size of the request body.
+        bytes_received (int): Size of the response body if it is known.
+        latency (float): Seconds until the final response was received,
+            including all retries.
+        retries (int): Number of retried attempts.
+        error (Exception): Exception raised while sending the request.
+
+    """
+
+    __slots__ = (
+        "operation",
+        "call",
+        "method",
+        "path",
+        "url",
+        "request",
+        "status",
+        "bytes_sent",
+        "bytes_received",
+        "latency",
+        "retries",
+        "error",
+    )
+
+    def __init__(self, operation, call, method, path, url, request=None):
+        self.operation = operation
+        self.call = call
+        self.method = method
+        self.path = path
+        self.url = url
+        self.request = request
+        self.status = None
+        self.bytes_sent = len(request.body or b"") if request is not None else 0
+        self.bytes_received = None
+        self.latency = None
+        self.retries = 0
+        self.error = None
+
+    def __repr__(self):  # noqa
+        return "<RequestEvent {operation}:{call} {method} {path} {status}>".format(
+            operation=self.operation,
+            call=self.call,
+            method=self.method,
+            path=self.path,
+            status=self.status,
+        )
+
+
+class Histogram():
+    """Cumulative latency histogram with fixed buckets."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Estimate a quantile as the upper bound of the bucket that contains it."""
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+
+        return self.max  # pragma: no cover
+
+    def to_dict(self):
+        buckets = dict((str(bound), count) for bound, count in zip(self.buckets, self.counts))
+
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class MetricsCollector():
+    """
+    In-process collector of request metrics.
+
+    Register it as `after_request` hook (or pass `metrics=True` to the client).
+    Requests are aggregated by operation, call, method and path template.
+
+    Args:
+        exporters (list): `Exporter` instances that receive the metrics on `export`.
+        buckets (tuple): Upper bounds of the latency histogram buckets.
+
+    """
+
+    def __init__(self, exporters=None, buckets=LATENCY_BUCKETS):
+        self.exporters = list(exporters or [])
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def __call__(self, event):  # noqa
+        key = (event.operation, event.call, event.method, event.path)
+
+        with self._lock:
+            entry = self._series.get(key)
+            if entry is None:
+                entry = self._series[key] = {
+                    "requests": 0,
+                    "errors": 0,
+                    "retries": 0,
+                    "bytes_sent": 0,
+                    "bytes_received": 0,
+                    "status": defaultdict(int),
+                    "latency": Histogram(self.buckets),
+                }
+
+            entry["requests"] += 1
+            entry["retries"] += event.retries
+            entry["bytes_sent"] += event.bytes_sent or 0
+            entry["bytes_received"] += event.bytes_received or 0
+            entry["status"][event.status] += 1
+            if event.error is not None or event.status is None or event.status >= 400:
+                entry["errors"] += 1
+            if event.latency is not None:
+                entry["latency"].observe(event.latency)
+
+    def reset(self):
+        """Drop all collected metrics."""
+        with self._lock:
+            self._series = {}
+
+    def snapshot(self):
+        """
+        Get the collected metrics.
+
+        Returns:
+            list: One dictionary per operation, call, method and path template with
+                request, error and retry counters, transferred bytes, status codes
+                and the latency histogram.
+
+        """
+        with self._lock:
+            result = []
+            for (op, call, method, path), entry in sorted(self._series.items(), key=_sort_key):
+                result.append({
+                    "operation": op,
+                    "call": call,
+                    "method": method,
+                    "path": path,
+                    "requests": entry["requests"],
+                    "errors": entry["errors"],
+                    "retries": entry["retries"],
+                    "bytes_sent": entry["bytes_sent"],
+                    "bytes_received": entry["bytes_received"],
+                    "status": dict((str(k), v) for k, v in entry["status"].items()),
+                    "latency": entry["latency"].to_dict(),
+                })
+
+        return result
+
+    def export(self, reset=False):
+        """
+        Pass the collected metrics to all exporters.
+
+        Args:
+            reset (bool): Drop the collected metrics afterwards.
+
+        Returns:
+            list: The exported metrics, see `snapshot`.
+
+        """
+        metrics = self.snapshot()
+        if reset:
+            self.reset()
+
+        for exporter in self.exporters:
+            exporter.export(metrics)
+
+        return metrics
+
+
+def _sort_key(item):
+    return tuple(str(part) for part in item[0])
+
+
+class Exporter():
+    """Interface of metrics exporters used by `MetricsCollector.export`."""
+
+    def export(self, metrics):
+        """
+        Publish collected metrics.
+
+        Args:
+            metrics (list): Metrics as returned by `MetricsCollector.snapshot`.
+
+        """
+        raise NotImplementedError
+
+
+class LoggingExporter(Exporter):
+    """Write a summary line per metric series to a logger."""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger("corenetworks.metrics")
+        self.level = level
+
+    def export(self, metrics):
+        for m in metrics:
+            self.logger.log(
+                self.level,
+                "%s:%s %s %s requests=%d errors=%d retries=%d p50=%s p95=%s",
+                m["operation"],
+                m["call"],
+                m["method"],
+                m["path"],
+                m["requests"],
+                m["errors"],
+                m["retries"],
+                m["latency"]["p50"],
+                m["latency"]["p95"],
+            )
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""Multi-account API client."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+
+from six import iteritems
+
+from .client import CoreNetworks
+from .exceptions import CorenetworksError
+
+
+class CoreNetworksPool():
+    """
+    Route requests to the clients of multiple Core Networks accounts.
+
+    One client is kept per account, it logs in on its first request or when the pool
+    is warmed up with `warm`. All clients share a single pooled HTTP session
+    and, if given, a `token_store`; accounts with identical credentials share one
+    client and therefore one token. Zone operations are routed through an index of
+    zone names to accounts that is built from `zones` of all accounts.
+
+    Args:
+        accounts (dict): Dictionary of account names to client options, e.g.
+            `{"prod": {"user": "...", "password": "..."}, "lab": {"api_token": "..."}}`.
+            Every entry is passed to `corenetworks.client.CoreNetworks`.
+        max_workers (int): Number of worker threads for cross-account operations.
+            Defaults to `pool_maxsize`.
+        **options: Client options shared by all accounts, see
+            `corenetworks.client.CoreNetworks`. The connection pool options apply to
+            the shared session.
+
+    """
+
+    def __init__(self, accounts, max_workers=None, **options):
+        if not accounts:
+            raise CorenetworksError("No accounts configured")
+
+        self.options = options
+        self.max_workers = max_workers or options.get("pool_maxsize") or 10
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._index = {}
+        self._generation = 0
+        self._clients = {}
+
+        session_config = {
+            "pool_connections": options.get("pool_connections") or 10,
+            "pool_maxsize": options.get("pool_maxsize") or 10,
+            "pool_block": options.get("pool_block") or False,
+            "keep_alive": options.get("keep_alive", True) is not False,
+        }
+        self._session = CoreNetworks._build_session(session_config)
+
+        connected = False
+        try:
+            self._connect(accounts)
+            connected = True
+        finally:
+            if not connected:
+                self._session.close()
+
+    def __enter__(self):  # noqa
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):  # noqa
+        self.close()
+
+    @property
+    def accounts(self):
+        """Names of the configured accounts."""
+        return list(self._clients)
+
+    def _connect(self, accounts):
+        """Create one client per distinct set of credentials, they log in on first use."""
+        shared = {}
+        for (name, account) in iteritems(accounts):
+            config = dict(self.options, **account)
+            key = (
+                config.get("user"),
+                config.get("password"),
+                config.get("api_token"),
+                config.get("endpoint"),
+            )
+            client = shared.get(key)
+            if client is None:
+                transport = config.pop("transport", None)
+                client = shared[key] = CoreNetworks(session=self._session, **config)
+                if transport is not None:
+                    # the session is owned by the pool, transports are mounted per endpoint
+                    self._session.mount(client.config["endpoint"].rstrip("/") + "/", transport)
+            self._clients[name] = client
+
+    def close(self):
+        """Commit pending DNS zones of all accounts and release the shared session."""
+        try:
+            for client in set(self._clients.values()):
+                client.close()
+        finally:
+            self._session.close()
+
+    def warm(self):
+        """
+        Log in all clients and build the zone index in parallel.
+
+        Clients log in on their first request. Warming the pool up front takes the
+        logins and the first index refresh out of the first zone operations and
+        raises an `AuthError` for wrong credentials right away.
+        """
+        self.zones()
+
+    def client(self, account):
+        """Get the client of an account."""
+        try:
+            return self._clients[account]
+        except KeyError:
+            raise CorenetworksError("Unknown account: {account}".format(account=account))
+
+    def map_accounts(self, func, accounts=None):
+        """
+        Run a function for multiple accounts in parallel.
+
+        Args:
+            func (callable): Function that is called with the account name and its client.
+            accounts (list): Names of the target accounts. Defaults to all accounts.
+
+        Returns:
+            tuple: Dictionary of results and dictionary of raised exceptions,
+                both keyed by account name.
+
+        """
+        names = self.accounts if accounts is None else list(accounts)
+        results = {}
+        errors = {}
+
+        if not names:
+            return results, errors
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names))) as pool:
+            futures = dict((pool.submit(func, name, self.client(name)), name) for name in names)
+
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:  # noqa
+                    errors[name] = e
+
+        return results, errors
+
+    # ZONES
+
+    def refresh(self):
+        """
+        Rebuild the zone index from the zones of all accounts.
+
+        If a zone is visible to several accounts, it is routed to the first
+        configured account.
+
+        Returns:
+            dict: Dictionary of zone names to account names.
+
+        """
+        self.zones()
+
+        with self._lock:
+            return dict(self._index)
+
+    def account(self, zone):
+        """
+        Get the name of the account that manages a DNS zone.
+
+        The zone index is refreshed once if the zone is unknown. Concurrent lookups
+        of unknown zones share a single refresh.
+        """
+        with self._lock:
+            account = self._index.get(zone)
+            generation = self._generation
+
+        if account is None:
+            with self._refresh_lock:
+                with self._lock:
+                    refreshed = self._generation != generation
+                    index = dict(self._index)
+
+                # another thread rebuilt the index while this one was waiting
+                if not refreshed:
+                    index = self.refresh()
+
+            account = index.get(zone)
+
+        if account is None:
+            raise CorenetworksError("Zone not found in any account: {zone}".format(zone=zone))
+
+        return account
+
+    def client_for(self, zone):
+        """Get the client of the account that manages a DNS zone."""
+        return self._clients[self.account(zone)]
+
+    def zones(self):
+        """
+        Get the DNS zones of all accounts and refresh the zone index.
+
+        Returns:
+            dict: Dictionary of zone lists keyed by account name.
+
+        """
+        results, errors = self.map_accounts(lambda name, client: client.zones())
+
+        for name in self.accounts:
+            if name in errors:
+                raise errors[name]
+
+        index = {}
+        for name in self.accounts:
+            for zone in results[name]:
+                index.setdefault(zone["name"], name)
+
+        with self._lock:
+            self._index = index
+            self._generation += 1
+
+        return results
+
+    def zone(self, zone):
+        """Get details about a DNS zone, see `corenetworks.client.CoreNetworks.zone`."""
+        return self.client_for(zone).zone(zone)
+
+    # RECORDS
+
+    def records(self, zone, params={}):
+        """Get the records of a DNS zone, see `corenetworks.client.CoreNetworks.records`."""
+        return self.client_for(zone).records(zone, params)
+
+    def iter_records(self, zone, params={}):
+        """Iterate over the records of a DNS zone, see `corenetworks.client.CoreNetworks`."""
+        return self.client_for(zone).iter_records(zone, params)
+
+    def add_record(self, zone, params, verify=False):
+        """Create a record, see `corenetworks.client.CoreNetworks.add_record`."""
+        return self.client_for(zone).add_record(zone, params, verify=verify)
+
+    def add_records(self, zone, records, commit=None):
+        """Create multiple records, see `corenetworks.client.CoreNetworks.add_records`."""
+        return self.client_for(zone).add_records(zone, records, commit=commit)
+
+    def sync_zone(self, zone, records, prune=False, dry_run=False, commit=None):
+        """Converge a DNS zone, see `corenetworks.client.CoreNetworks.sync_zone`."""
+        return self.client_for(zone).sync_zone(
+            zone, records, prune=prune, dry_run=dry_run, commit=commit
+        )
+
+    def delete_record(self, zone, params):
+        """Delete records, see `corenetworks.client.CoreNetworks.delete_record`."""
+        return self.client_for(zone).delete_record(zone, params)
+
+    def commit(self, zone):
+        """Commit a DNS zone, see `corenetworks.client.CoreNetworks.commit`."""
+        return self.client_for(zone).commit(zone)
+
+    def transaction(self, zone):
+        """Coalesce commits, see `corenetworks.client.CoreNetworks.transaction`."""
+        return self.client_for(zone).transaction(zone)
+
+    def flush(self):
+        """Commit pending DNS zones of all accounts."""
+        results, errors = self.map_accounts(lambda name, client: client.flush())
+
+        for name in self.accounts:
+            if name in errors:
+                raise errors[name]
+
+        return sorted(set(zone for zones in results.values() for zone in zones))
+
+    # BULK
+
+    def records_many(self, zones, params={}, max_workers=None):
+        """
+        Get the records of DNS zones of any account in parallel.
+
+        Args:
+            zones (list): Names of the target DNS zones.
+            params (dict): Dictionary of filter parameters applied to every zone.
+            max_workers (int): Number of worker threads.
+
+        Returns:
+            tuple: Dictionary of record lists and dictionary of raised exceptions,
+                both keyed by zone name.
+
+        """
+        zones = list(zones)
+        results = {}
+        errors = {}
+
+        if not zones:
+            return results, errors
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as pool:
+            futures = dict((pool.submit(self.records, zone, params), zone) for zone in zones)
+
+            for future in as_completed(futures):
+                zone = futures[future]
+                try:
+                    results[zone] = future.result()
+                except Exception as e:  # noqa
+                    errors[zone] = e
+
+        return results, errors
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""Indexed in-memory record set."""
+
+import functools
+import operator
+import re
+
+from six import iteritems
+from six import itervalues
+
+
+def _values(value):
+    return value if isinstance(value, list) else [value]
+
+
+def _ttl(value):
+    return int(value) if value is not None else None
+
+
+def match_record(record, params):
+    """
+    Check if a record matches the given filter parameters.
+
+    Filter values can be a single value or a list of accepted values, the same
+    way they are passed to `corenetworks.client.CoreNetworks.records`. The record
+    can be a dictionary or a `Record`.
+    """
+    if isinstance(record, Record):
+        get = functools.partial(getattr, record)
+    else:
+        get = record.get
+
+    for (key, value) in iteritems(params):
+        accepted = _values(value)
+        current = get(key, None)
+
+        if key == "ttl":
+            accepted = [_ttl(v) for v in accepted]
+            current = _ttl(current)
+
+        if current not in accepted:
+            return False
+
+    return True
+
+
+def _regex(pattern):
+    compiled = re.compile(pattern)
+    return lambda current: current is not None and compiled.search(current) is not None
+
+
+def _compare(op, value):
+    return lambda current: current is not None and op(current, value)
+
+
+def _string_method(method, value):
+    return lambda current: current is not None and getattr(current, method)(value)
+
+
+#: Local filter operators, each builds a check for the filter value.
+OPERATORS = {
+    "eq": lambda value: lambda current: current == value,
+    "in": lambda values: functools.partial(operator.contains, frozenset(values)),
+    "not": lambda values: lambda current: current not in frozenset(_values(values)),
+    "regex": _regex,
+    "startswith": functools.partial(_string_method, "startswith"),
+    "endswith": functools.partial(_string_method, "endswith"),
+    "contains": functools.partial(_string_method, "__contains__"),
+    "gt": functools.partial(_compare, operator.gt),
+    "gte": functools.partial(_compare, operator.ge),
+    "lt": functools.partial(_compare, operator.lt),
+    "lte": functools.partial(_compare, operator.le),
+}
+
+
+def compile_filter(params):
+    """
+    Split filter parameters into the part the API supports and a local predicate.
+
+    Plain values and lists are exact matches the API can evaluate. A dictionary of
+    operators is evaluated locally, e.g. `{"name": {"endswith": ".dev"}}` or
+    `{"ttl": {"gte": 300, "lt": 3600}, "type": {"not": "SOA"}}`. An `in` or `eq`
+    operator is still pushed down to the API to narrow the result. An empty list
+    of accepted values, e.g. `{"name": []}` or `{"name": {"in": []}}`, matches no
+    record, see `matches_nothing`.
+
+    Args:
+        params (dict): Dictionary of filter parameters.
+
+    Returns:
+        tuple: Dictionary of filter parameters for the API and a predicate that
+            checks a record dictionary or `Record` against the remaining
+            operators, or `None` if there are none.
+
+    """
+    pushdown = {}
+    checks = []
+
+    for (key, value) in iteritems(params):
+        if not isinstance(value, dict):
+            pushdown[key] = value
+            continue
+
+        local = dict(value)
+        if "in" in local:
+            pushdown[key] = local.pop("in")
+        elif "eq" in local:
+            pushdown[key] = local.pop("eq")
+
+        for (name, operand) in iteritems(local):
+            checks.append((key, OPERATORS[name](operand)))
+
+    if not checks:
+        return pushdown, None
+
+    def predicate(record):
+        if isinstance(record, Record):
+            get = functools.partial(getattr, record)
+        else:
+            get = record.get
+
+        for key, check in checks:
+            current = get(key, None)
+            if key == "ttl":
+                current = _ttl(current)
+            if not check(current):
+                return False
+
+        return True
+
+    return pushdown, predicate
+
+
+def matches_nothing(params):
+    """
+    Check if pushed down filter parameters accept no value for some key.
+
+    The API ignores an empty list and returns all records, so callers must not
+    send such a filter but return no records.
+    """
+    return any(isinstance(value, list) and not value for value in itervalues(params))
+
+
+class Record():
+    """Compact representation of a single DNS record."""
+
+    __slots__ = ("name", "ttl", "type", "data")
+
+    def __init__(self, name, ttl, type, data):  # noqa
+        self.name = name
+        self.ttl = ttl
+        self.type = type
+        self.data = data
+
+    @classmethod
+    def from_dict(cls, record):
+        """Create a record from an API record dictionary."""
+        return cls(record.get("name"), record.get("ttl"), record.get("type"), record.get("data"))
+
+    def __eq__(self, other):  # noqa
+        return all([
+            isinstance(other, Record),
+            self.key == getattr(other, "key", None),
+            _ttl(self.ttl) == _ttl(getattr(other, "ttl", None)),
+        ])
+
+    def __ne__(self, other):  # noqa
+        return not self == other
+
+    def __hash__(self):  # noqa
+        return hash((self.name, _ttl(self.ttl), self.type, self.data))
+
+    def __repr__(self):  # noqa
+        return "Record(name={name!r}, ttl={ttl!r}, type={type!r}, data={data!r})".format(
+            **self.to_dict()
+        )
+
+    @property
+    def key(self):
+        """Identity of the record without the TTL."""
+        return (self.name, self.type, self.data)
+
+    def to_dict(self):
+        """Return the record as API record dictionary."""
+        return {"name": self.name, "ttl": self.ttl, "type": self.type, "data": self.data}
+
+
+class RecordSet():
+    """
+    Collection of DNS records with hash indexes on name, type and (name, type).
+
+    `filter` accepts the same parameters as `corenetworks.client.CoreNetworks.records`
+    and only scans the records of the most selective index bucket.
+    """
+
+    def __init__(self, records=()):
+        self._records = {}
+        self._by_name = {}
+        self._by_type = {}
+        self._by_name_type = {}
+        self._next_id = 0
+
+        for record in records:
+            self.add(record)
+
+    def __len__(self):  # noqa
+        return len(self._records)
+
+    def __iter__(self):  # noqa
+        return iter(list(self._records.values()))
+
+    def __contains__(self, record):  # noqa
+        if isinstance(record, dict):
+            record = Record.from_dict(record)
+
+        return any(r == record for r in self._lookup(record.name, record.type))
+
+    def add(self, record):
+        """
+        Add a record to the set.
+
+        Args:
+            record (dict|Record): Record to add.
+
+        Returns:
+            Record: The stored record.
+
+        """
+        if isinstance(record, dict):
+            record = Record.from_dict(record)
+
+        rid = self._next_id
+        self._next_id += 1
+
+        self._records[rid] = record
+        self._by_name.setdefault(record.name, {})[rid] = None
+        self._by_type.setdefault(record.type, {})[rid] = None
+        self._by_name_type.setdefault((record.name, record.type), {})[rid] = None
+
+        return record
+
+    def filter(self, params={}):  # noqa
+        """
+        Get all records that match the filter parameters.
+
+        Args:
+            params (dict): Dictionary of filter parameters.
+
+        Returns:
+            list: List of matching `Record` objects in insertion order.
+
+        """
+        return [self._records[rid] for rid in self._select(params)]
+
+    def discard(self, params):
+        """
+        Remove all records that match the filter parameters.
+
+        Args:
+            params (dict): Dictionary of filter parameters. An empty dictionary
+                removes all records.
+
+        Returns:
+            list: List of removed `Record` objects.
+
+        """
+        removed = []
+        for rid in self._select(params):
+            record = self._records.pop(rid)
+            self._unindex(self._by_name, record.name, rid)
+            self._unindex(self._by_type, record.type, rid)
+            self._unindex(self._by_name_type, (record.name, record.type), rid)
+            removed.append(record)
+
+        return removed
+
+    def to_list(self):
+        """Return all records as list of API record dictionaries."""
+        return [r.to_dict() for r in self._records.values()]
+
+    def _lookup(self, name, rtype):
+        ids = self._by_name_type.get((name, rtype), {})
+        return [self._records[rid] for rid in ids]
+
+    def _select(self, params):
+        params, predicate = compile_filter(params)
+        names = params.get("name")
+        types = params.get("type")
+
+        if names is not None and types is not None:
+            buckets = [
+                self._by_name_type.get((n, t), {}) for n in _values(names) for t in _values(types)
+            ]
+        elif names is not None:
+            buckets = [self._by_name.get(n, {}) for n in _values(names)]
+        elif types is not None:
+            buckets = [self._by_type.get(t, {}) for t in _values(types)]
+        else:
+            buckets = [self._records]
+
+        rest = dict((k, v) for k, v in iteritems(params) if k not in ("name", "type"))
+
+        if len(buckets) == 1:
+            ids = list(buckets[0])
+        else:
+            ids = sorted(set(rid for bucket in buckets for rid in bucket))
+
+        if rest:
+            ids = [rid for rid in ids if match_record(self._records[rid], rest)]
+
+        if predicate is not None:
+            ids = [rid for rid in ids if predicate(self._records[rid])]
+
+        return ids
+
+    @staticmethod
+    def _unindex(index, key, rid):
+        bucket = index[key]
+        del bucket[rid]
+        if not bucket:
+            del index[key]
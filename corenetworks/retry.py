@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Retry and rate limit policies."""
+
+import email.utils
+import random
+import threading
+import time
+
+
+class RetryPolicy():
+    """
+    Define how failed requests are retried.
+
+    Idempotent requests are retried on connection errors and on any status in
+    `status_forcelist`. Other requests are only retried if the server rejected
+    them without processing (HTTP 429). The delay grows exponentially with
+    `backoff_factor`, is capped at `backoff_max` and randomized with jitter
+    unless the server sends a `Retry-After` header.
+    """
+
+    def __init__(
+        self,
+        total=3,
+        backoff_factor=0.5,
+        backoff_max=30,
+        jitter=True,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after=True,
+    ):
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.status_forcelist = status_forcelist
+        self.respect_retry_after = respect_retry_after
+
+    def is_retryable(self, status_code, idempotent):
+        """Check if a response status can be retried."""
+        if status_code == 429:
+            return True
+
+        return idempotent and status_code in self.status_forcelist
+
+    def backoff(self, attempt, response=None):
+        """
+        Get the delay in seconds before the next attempt.
+
+        Args:
+            attempt (int): Number of the failed attempt, starting at 0.
+            response (requests.Response): The failed response if there is one.
+
+        """
+        if self.respect_retry_after and response is not None:
+            retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+
+        delay = min(self.backoff_max, self.backoff_factor * (2**attempt))
+
+        if self.jitter:
+            delay = delay / 2 + random.uniform(0, delay / 2)  # nosec
+
+        return delay
+
+    def sleep(self, attempt, response=None):
+        time.sleep(self.backoff(attempt, response))
+
+    @staticmethod
+    def _parse_retry_after(value):
+        if not value:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        parsed = email.utils.parsedate_tz(value)
+        if parsed is None:
+            return None
+
+        return max(0.0, email.utils.mktime_tz(parsed) - time.time())
+
+
+class TokenBucket():
+    """
+    Client side rate limiter.
+
+    Allows `rate` requests per second on average with bursts of up to `capacity`
+    requests. The limiter is thread-safe; waiting callers are served in order.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Take a token and block until the request is allowed."""
+        with self._lock:
+            self._refill()
+
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+        return wait
+
+    def try_acquire(self):
+        """
+        Take a token without blocking.
+
+        Returns:
+            float: `0` if the token was taken, otherwise the seconds until the next
+                token is available.
+
+        """
+        with self._lock:
+            self._refill()
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+
+            return (1 - self._tokens) / self.rate
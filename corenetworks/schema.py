@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""Request parameter schemas."""
+
+import copy
+
+RECORD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {
+            "type": "string"
+        },
+        "ttl": {
+            "type": "number"
+        },
+        "type": {
+            "type": "string"
+        },
+        "data": {
+            "type": "string"
+        },
+    },
+}
+
+ADD_RECORD_SCHEMA = copy.deepcopy(RECORD_SCHEMA)
+ADD_RECORD_SCHEMA["required"] = ["name", "type", "data", "ttl"]
+
+DELETE_RECORD_SCHEMA = copy.deepcopy(RECORD_SCHEMA)
+DELETE_RECORD_SCHEMA["properties"]["force_all"] = {"type": "boolean"}
+DELETE_RECORD_SCHEMA["anyOf"] = [{
+    "required": ["name"]
+}, {
+    "required": ["type"]
+}, {
+    "required": ["data"]
+}, {
+    "required": ["force_all"]
+}]
+
+_STRINGS = {
+    "anyOf": [{
+        "type": "string",
+    }, {
+        "type": "array",
+        "items": {
+            "type": "string"
+        },
+    }],
+}
+
+_NUMBERS = {
+    "anyOf": [{
+        "type": "number",
+    }, {
+        "type": "array",
+        "items": {
+            "type": "number"
+        },
+    }],
+}
+
+_STRING_OPERATORS = {
+    "type": "object",
+    "minProperties": 1,
+    "additionalProperties": False,
+    "properties": {
+        "eq": {
+            "type": "string"
+        },
+        "in": {
+            "type": "array",
+            "items": {
+                "type": "string"
+            },
+        },
+        "not": _STRINGS,
+        "regex": {
+            "type": "string",
+            "format": "regex"
+        },
+        "startswith": {
+            "type": "string"
+        },
+        "endswith": {
+            "type": "string"
+        },
+        "contains": {
+            "type": "string"
+        },
+    },
+}
+
+_NUMBER_OPERATORS = {
+    "type": "object",
+    "minProperties": 1,
+    "additionalProperties": False,
+    "properties": {
+        "eq": {
+            "type": "number"
+        },
+        "in": {
+            "type": "array",
+            "items": {
+                "type": "number"
+            },
+        },
+        "not": _NUMBERS,
+        "gt": {
+            "type": "number"
+        },
+        "gte": {
+            "type": "number"
+        },
+        "lt": {
+            "type": "number"
+        },
+        "lte": {
+            "type": "number"
+        },
+    },
+}
+
+FILTER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {
+            "anyOf": _STRINGS["anyOf"] + [_STRING_OPERATORS],
+        },
+        "ttl": {
+            "anyOf": _NUMBERS["anyOf"] + [_NUMBER_OPERATORS],
+        },
+        "type": {
+            "anyOf": _STRINGS["anyOf"] + [_STRING_OPERATORS],
+        },
+        "data": {
+            "anyOf": _STRINGS["anyOf"] + [_STRING_OPERATORS],
+        },
+    },
+}
+
+SCHEMAS = {
+    "record": RECORD_SCHEMA,
+    "add_record": ADD_RECORD_SCHEMA,
+    "delete_record": DELETE_RECORD_SCHEMA,
+    "filter": FILTER_SCHEMA,
+}
+
+_validators = {}
+
+
+def get_validator(name):
+    """
+    Get the compiled validator of a named schema.
+
+    The schema is checked against its meta-schema and compiled only once, the
+    validator instance is shared by all clients. `jsonschema` is imported by the
+    first validation, not by importing the package.
+    """
+    validator = _validators.get(name)
+
+    if validator is None:
+        import jsonschema
+
+        schema = SCHEMAS[name]
+        cls = jsonschema.validators.validator_for(schema)
+        cls.check_schema(schema)
+        formats = jsonschema.FormatChecker(formats=("regex",))
+        validator = _validators[name] = cls(schema, format_checker=formats)
+
+    return validator
+
+
+def validation_error(data, name):
+    """
+    Validate data against a named schema.
+
+    Returns:
+        jsonschema.exceptions.ValidationError: The most relevant error or `None`
+            if the data is valid. This is the same error `jsonschema.validate` raises.
+
+    """
+    validator = get_validator(name)
+
+    if validator.is_valid(data):
+        return None
+
+    from jsonschema.exceptions import best_match
+
+    return best_match(validator.iter_errors(data))
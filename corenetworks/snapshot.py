@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""Compact zone snapshots."""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+
+from six import iteritems
+
+from .exceptions import CorenetworksError
+from .records import RecordSet
+from .records import compile_filter
+
+MAGIC = b"CNSNAP"
+VERSION = 1
+FLAG_COMPRESSED = 1
+
+# magic, version, flags, header length
+_PREAMBLE = struct.Struct("<6sBBI")
+_COLUMNS = ("name", "type", "data", "ttl")
+
+
+def _uint32(values=()):
+    column = array("I", values)
+    if column.itemsize != 4:  # pragma: no cover
+        column = array("L", values)
+    return column
+
+
+def dump(path, zones, records, compress=False):
+    """
+    Write a snapshot of zones and their records to a file.
+
+    All strings are interned into a single string table, records are stored
+    column-wise as 32 bit integers. Uncompressed snapshots can be memory-mapped
+    when they are loaded.
+
+    Args:
+        path (str): Target file, it is replaced atomically.
+        zones (list): List of zones as returned by `CoreNetworks.zones`.
+        records (dict): Dictionary of record lists keyed by zone name.
+        compress (bool): Compress the data section with zlib.
+
+    """
+    strings = {}
+    columns = dict((name, _uint32()) for name in _COLUMNS)
+    zone_index = []
+
+    def intern(value):
+        value = "" if value is None else str(value)
+        sid = strings.get(value)
+        if sid is None:
+            sid = strings[value] = len(strings)
+        return sid
+
+    for zone in sorted(records):
+        start = len(columns["ttl"])
+        for r in records[zone]:
+            columns["name"].append(intern(r.get("name")))
+            columns["type"].append(intern(r.get("type")))
+            columns["data"].append(intern(r.get("data")))
+            columns["ttl"].append(int(r.get("ttl") or 0))
+        zone_index.append([zone, start, len(columns["ttl"]) - start])
+
+    encoded = [s.encode("utf-8") for s in sorted(strings, key=strings.get)]
+    offsets = _uint32([0])
+    for s in encoded:
+        offsets.append(offsets[-1] + len(s))
+
+    sections = [("offsets", offsets)] + [(name, columns[name]) for name in _COLUMNS]
+    if sys.byteorder == "big":  # pragma: no cover
+        for _, column in sections:
+            column.byteswap()
+
+    layout = {}
+    chunks = []
+    position = 0
+    for name, column in sections:
+        data = column.tobytes()
+        layout[name] = [position, len(column)]
+        chunks.append(data)
+        position += len(data)
+
+    blob = b"".join(encoded)
+    layout["strings"] = [position, len(blob)]
+    chunks.append(blob)
+
+    body = b"".join(chunks)
+    flags = 0
+    if compress:
+        body = zlib.compress(body)
+        flags |= FLAG_COMPRESSED
+
+    header = json.dumps({
+        "zones": zones,
+        "zone_index": zone_index,
+        "sections": layout,
+    }).encode("utf-8")
+
+    # align the data section for memory-mapped column access
+    padding = -(_PREAMBLE.size + len(header)) % 8
+    header += b" " * padding
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, VERSION, flags, len(header)))
+            f.write(header)
+            f.write(body)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def load(path):
+    """
+    Load a snapshot written by `dump`.
+
+    Returns:
+        Snapshot: Read-only snapshot.
+
+    """
+    return Snapshot(path)
+
+
+class Snapshot():
+    """
+    Read-only data source backed by a snapshot file.
+
+    Provides the read methods of `corenetworks.client.CoreNetworks` (`zones`,
+    `zone`, `records` and `iter_records`) with the same filter semantics.
+    Uncompressed snapshots are memory-mapped and strings are decoded lazily.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = None
+        self._views = []
+        self._columns = {}
+        self._strings = None
+        self._strings_cache = {}
+        self._string_index = None
+
+        loaded = False
+        try:
+            self._load()
+            loaded = True
+        finally:
+            if not loaded:
+                self.close()
+
+    def _load(self):
+        preamble = self._file.read(_PREAMBLE.size)
+        if len(preamble) != _PREAMBLE.size:
+            raise CorenetworksError("Invalid snapshot: {path}".format(path=self.path))
+
+        magic, version, flags, length = _PREAMBLE.unpack(preamble)
+        if magic != MAGIC or version != VERSION:
+            raise CorenetworksError("Invalid snapshot: {path}".format(path=self.path))
+
+        header = json.loads(self._file.read(length).decode("utf-8"))
+        offset = _PREAMBLE.size + length
+
+        if flags & FLAG_COMPRESSED:
+            body = self._view(memoryview(zlib.decompress(self._file.read())))
+        else:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            body = self._view(self._view(memoryview(self._mmap))[offset:])
+
+        self._zones = header["zones"]
+        self._zone_index = dict((z, (start, count)) for z, start, count in header["zone_index"])
+
+        sections = header["sections"]
+        for name in ("offsets",) + _COLUMNS:
+            start, count = sections[name]
+            self._columns[name] = self._column(body, start, count)
+
+        start, size = sections["strings"]
+        self._strings = self._view(body[start:start + size])
+
+    def __enter__(self):  # noqa
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):  # noqa
+        self.close()
+
+    def _view(self, view):
+        self._views.append(view)
+        return view
+
+    def _column(self, body, start, count):
+        view = self._view(body[start:start + count * 4])
+        if sys.byteorder == "little":
+            return self._view(view.cast("I"))
+
+        column = _uint32()  # pragma: no cover
+        column.frombytes(view.tobytes())  # pragma: no cover
+        column.byteswap()  # pragma: no cover
+        return column  # pragma: no cover
+
+    def close(self):
+        """Release the file and the memory map."""
+        self._columns = {}
+        self._strings = None
+        self._string_index = None
+
+        while self._views:
+            self._views.pop().release()
+
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+        self._file.close()
+
+    def _string(self, sid):
+        value = self._strings_cache.get(sid)
+        if value is None:
+            offsets = self._columns["offsets"]
+            value = bytes(self._strings[offsets[sid]:offsets[sid + 1]]).decode("utf-8")
+            self._strings_cache[sid] = value
+        return value
+
+    def _string_ids(self, values):
+        """Map filter values to string table ids without decoding the table."""
+        if self._string_index is None:
+            # strings are interned, every value has exactly one id
+            offsets = self._columns["offsets"]
+            strings = self._strings
+            index = {}
+            for sid in range(len(offsets) - 1):
+                index[bytes(strings[offsets[sid]:offsets[sid + 1]])] = sid
+            self._string_index = index
+
+        ids = set()
+        for v in values:
+            sid = self._string_index.get(str(v).encode("utf-8"))
+            if sid is not None:
+                ids.add(sid)
+        return ids
+
+    @property
+    def zone_names(self):
+        return sorted(self._zone_index)
+
+    def zones(self):
+        """
+        Get the list of DNS zones.
+
+        Returns:
+            list: List of zones.
+
+        """
+        return [dict(z) for z in self._zones]
+
+    def zone(self, zone):
+        """
+        Get details about a DNS zone.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+
+        Returns:
+            list: List of zones.
+
+        """
+        result = [dict(z) for z in self._zones if z.get("name") == zone]
+        if not result:
+            raise CorenetworksError("Zone not found in snapshot: {zone}".format(zone=zone))
+        return result
+
+    def iter_records(self, zone, params={}):
+        """
+        Iterate over the records for the specific domain.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+            params (dict): Dictionary of filter parameters.
+                See `corenetworks.client.CoreNetworks.records`.
+
+        Yields:
+            dict: Matching records.
+
+        """
+        if zone not in self._zone_index:
+            raise CorenetworksError("Zone not found in snapshot: {zone}".format(zone=zone))
+
+        start, count = self._zone_index[zone]
+        columns = self._columns
+        params, predicate = compile_filter(params)
+
+        checks = []
+        for (key, value) in iteritems(params):
+            values = value if isinstance(value, list) else [value]
+            if key == "ttl":
+                checks.append((columns["ttl"], set(int(v) for v in values)))
+            elif key in columns:
+                checks.append((columns[key], self._string_ids(values)))
+            else:
+                raise CorenetworksError("Unknown filter: {key}".format(key=key))
+
+        for i in range(start, start + count):
+            if all(column[i] in accepted for column, accepted in checks):
+                record = {
+                    "name": self._string(columns["name"][i]),
+                    "ttl": columns["ttl"][i],
+                    "type": self._string(columns["type"][i]),
+                    "data": self._string(columns["data"][i]),
+                }
+                if predicate is None or predicate(record):
+                    yield record
+
+    def records(self, zone, params={}):
+        """
+        Get the list of records for the specific domain.
+
+        Args:
+            zone (str): Name of the target DNS zone.
+            params (dict): Dictionary of filter parameters.
+                See `corenetworks.client.CoreNetworks.records`.
+
+        Returns:
+            list: List of matching records.
+
+        """
+        return list(self.iter_records(zone, params))
+
+    def record_set(self, zone):
+        """Get all records of a zone as indexed `corenetworks.records.RecordSet`."""
+        return RecordSet(self.iter_records(zone))
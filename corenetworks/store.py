@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""Persistent token stores."""
+
+import binascii
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+
+
+class FileTokenStore():
+    """
+    Share login tokens between processes through a local file.
+
+    Tokens are keyed by endpoint and user and are only returned for the password
+    they were created with. Passwords are not stored, only a salted PBKDF2 hash
+    with `iterations` rounds. The file is readable by the owner only and replaced
+    atomically on every write.
+
+    A hash is derived once per salt and store instance. A new token of the same
+    user and password keeps the salt of the stored entry, so refreshing a token
+    does not derive it again.
+    """
+
+    def __init__(self, path=None, iterations=100000):
+        self.path = path or os.path.join(
+            os.path.expanduser("~"), ".cache", "corenetworks", "tokens.json"
+        )
+        self.iterations = iterations
+        self._secrets = {}
+
+    @staticmethod
+    def _key(user, endpoint):
+        return hashlib.sha256(
+            "{endpoint}\n{user}".format(endpoint=endpoint, user=user).encode("utf-8")
+        ).hexdigest()
+
+    @staticmethod
+    def _secret(password, salt, iterations):
+        secret = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+        return binascii.hexlify(secret).decode("ascii")
+
+    def _derive(self, password, salt, iterations):
+        key = (password, salt, iterations)
+        secret = self._secrets.get(key)
+        if secret is None:
+            secret = self._secrets[key] = self._secret(password, salt, iterations)
+        return secret
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        return data if isinstance(data, dict) else {}
+
+    def get(self, user, password, endpoint):
+        """
+        Get a stored token.
+
+        Returns:
+            tuple: Token and expiry datetime or `None` if no valid token is stored.
+
+        """
+        key = self._key(user, endpoint)
+        entry = self._read().get(key)
+
+        try:
+            salt = binascii.unhexlify(entry["salt"])
+            secret = self._derive(password, salt, int(entry["iterations"]))
+            if not hmac.compare_digest(entry["secret"], secret):
+                return None
+
+            expires = datetime.datetime.fromtimestamp(entry["expires"])
+            token = entry["token"]
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        if expires <= datetime.datetime.now():
+            return None
+
+        return token, expires
+
+    def _salt(self, entry, password):
+        """Keep the salt of an entry whose hash of the password is already derived."""
+        try:
+            salt = binascii.unhexlify(entry["salt"])
+            secret = self._secrets.get((password, salt, int(entry["iterations"])))
+            if entry["iterations"] == self.iterations and secret == entry["secret"]:
+                return salt
+        except (KeyError, TypeError, ValueError):
+            pass
+
+        return os.urandom(16)
+
+    def put(self, user, password, endpoint, token, expires):
+        """Store a token and drop all expired entries."""
+        key = self._key(user, endpoint)
+        now = datetime.datetime.now().timestamp()
+
+        entries = self._read()
+        data = {}
+        for k, v in entries.items():
+            if isinstance(v, dict) and v.get("expires", 0) > now:
+                data[k] = v
+
+        salt = self._salt(entries.get(key), password)
+        data[key] = {
+            "token": token,
+            "expires": expires.timestamp(),
+            "salt": binascii.hexlify(salt).decode("ascii"),
+            "iterations": self.iterations,
+            "secret": self._derive(password, salt, self.iterations),
+        }
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tokens-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.path)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Incremental JSON parsing."""
+
+import codecs
+import json
+import re
+
+from .exceptions import CorenetworksError
+
+_WHITESPACE = re.compile(r"\s*")
+_SCALAR = re.compile(r"[\w.+-]*")
+
+
+def iter_json_items(chunks):
+    """
+    Parse a JSON array from a stream of chunks and yield its items one by one.
+
+    Only the current item and the unparsed rest of the last chunk are kept in
+    memory. A top level JSON object is yielded as a single item.
+
+    Args:
+        chunks (iterable): Iterable of `bytes` or `str` chunks.
+
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    buf = ""
+    state = "start"
+
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = utf8.decode(chunk)
+
+        buf += chunk
+        pos = 0
+
+        while state not in ("object", "end"):
+            pos = _WHITESPACE.match(buf, pos).end()
+            if pos == len(buf):
+                break
+
+            char = buf[pos]
+            if state == "start":
+                if char == "[":
+                    pos += 1
+                    state = "first"
+                elif char == "{":
+                    state = "object"
+                else:
+                    raise CorenetworksError("Invalid JSON response: expected array")
+            elif state in ("first", "sep") and char == "]":
+                pos += 1
+                state = "end"
+            elif state == "sep":
+                if char != ",":
+                    raise CorenetworksError("Invalid JSON response: expected ',' or ']'")
+                pos += 1
+                state = "item"
+            else:
+                if char not in '{["' and _SCALAR.match(buf, pos).end() == len(buf):
+                    # numbers and literals end with a delimiter, it may be in the next chunk
+                    break
+
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    # incomplete item, wait for the next chunk
+                    break
+
+                yield item
+                pos = end
+                state = "sep"
+
+        if state != "object":
+            buf = buf[pos:]
+
+    buf += utf8.decode(b"", final=True)
+
+    if state == "object":
+        try:
+            yield json.loads(buf)
+        except ValueError as e:
+            raise CorenetworksError("Invalid JSON response: {reason}".format(reason=e), payload=e)
+    elif state == "end":
+        if buf.strip():
+            raise CorenetworksError("Invalid JSON response: trailing data")
+    elif state != "start" or buf.strip():
+        raise CorenetworksError("Invalid JSON response: unexpected end of data")
@@ -0,0 +1,131 @@
+"""Test asyncio client class."""
+
+import asyncio
+import datetime
+import threading
+import time
+
+import pytest
+from requests import Request
+
+from corenetworks import AsyncCoreNetworks
+from corenetworks.authenticators import CoreNetworksBasicAuth
+from corenetworks.test.fixtures.callback import records_post_callback
+from corenetworks.transport import AsyncTransport
+from corenetworks.transport import HTTPTransport
+from corenetworks.transport import MemoryTransport
+
+
+@pytest.fixture
+def client(mocker):
+    mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
+    client = AsyncCoreNetworks(user="testuser", password="testpass", concurrency=4)
+
+    yield client
+
+    client.close()
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_zones(requests_mock, client):
+    requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/",
+        text='[{"name":"example.com","type":"master"}]'
+    )
+
+    resp = run(client.zones())
+    assert resp == [{"name": "example.com", "type": "master"}]
+
+
+def test_records_many(client, mocker):
+
+    def slow_records(zone, params):
+        time.sleep(0.2)
+        return [{"type": "A", "ttl": 1800, "name": "test", "data": zone}]
+
+    mocker.patch.object(client._client, "records", side_effect=slow_records)
+    zones = ["a.com", "b.com", "c.com", "d.com"]
+
+    start = time.monotonic()
+    resp = run(client.records_many(zones, params={"type": ["A"]}))
+    elapsed = time.monotonic() - start
+
+    assert sorted(resp.keys()) == zones
+    assert resp["a.com"] == [{"type": "A", "ttl": 1800, "name": "test", "data": "a.com"}]
+    assert elapsed < 0.6
+
+
+def test_write_operations(requests_mock, client):
+    requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/delete",
+        text=records_post_callback,
+    )
+    requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/commit",
+        text=records_post_callback,
+    )
+
+    async def ops():
+        deleted = await client.delete_record("example.com", {"type": "A"})
+        committed = await client.commit("example.com")
+        return deleted, committed
+
+    assert run(ops()) == ([], [])
+
+
+def test_aclose(mocker):
+    mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
+    threads = []
+
+    async def close():
+        threads.append(threading.current_thread())
+        async with AsyncCoreNetworks(user="testuser", password="testpass") as client:
+            mocker.patch.object(
+                client._client,
+                "flush",
+                side_effect=lambda: threads.append(threading.current_thread())
+            )
+
+    run(close())
+
+    # the blocking close does not run on the event loop thread
+    assert len(threads) == 2
+    assert threads[1] is not threads[0]
+
+
+def test_async_transport():
+    memory = MemoryTransport()
+    memory.backend.add_token("token")
+    memory.backend.add_zone("example.com")
+
+    async def zones():
+        async with AsyncCoreNetworks(
+            api_token="token", endpoint="http://fake", transport=memory
+        ) as client:
+            request = client._client._session.prepare_request(
+                Request("GET", "http://fake/dnszones/", headers={"Authorization": "Bearer token"})
+            )
+            response = await client.transport.asend(request)
+            return client.transport, await client.zones(), response.json()
+
+    transport, result, raw = run(zones())
+
+    assert isinstance(transport, AsyncTransport)
+    assert transport.transport is memory
+    assert result == raw == [{"name": "example.com", "type": "master"}]
+
+    client = AsyncCoreNetworks(api_token="token")
+    assert isinstance(client.transport.transport, HTTPTransport)
+    assert client.transport.executor is client._executor
+    client.close()
@@ -1,11 +1,18 @@
 """Test authenticator classes."""
 
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from requests import Request
+
 from corenetworks.authenticators import CoreNetworksBasicAuth
 from corenetworks.authenticators import CoreNetworksTokenAuth
 
 
 def test_basic_auth(requests_mock):
-    requests_mock.post(
+    login = requests_mock.post(
         "https://beta.api.core-networks.de/auth/token",
         json={
             "token": "mytoken",
@@ -17,10 +24,125 @@ def test_basic_auth(requests_mock):
         user="test", password="test", endpoint="https://beta.api.core-networks.de"
     )
 
+    # the login is deferred to the first request
+    assert auth.token is None
+    assert login.call_count == 0
+
+    request = Request(method="GET", url="https://beta.api.core-networks.de/dnszones/").prepare()
+    auth(request)
+    auth(request)
+
     assert auth.token == "mytoken"
+    assert request.headers["Authorization"] == "Bearer mytoken"
+    assert login.call_count == 1
 
 
 def test_token_auth(requests_mock):
     auth = CoreNetworksTokenAuth(token="mytoken")
 
     assert auth.token == "mytoken"
+
+
+def test_basic_auth_refresh(requests_mock):
+    login = requests_mock.post(
+        "https://beta.api.core-networks.de/auth/token",
+        [{
+            "json": {
+                "token": "first",
+                "expires": 30
+            }
+        }, {
+            "json": {
+                "token": "second",
+                "expires": 3600
+            }
+        }],
+    )
+
+    auth = CoreNetworksBasicAuth(
+        user="test", password="test", endpoint="https://beta.api.core-networks.de"
+    )
+    assert auth.expired
+
+    request = Request(method="GET", url="https://beta.api.core-networks.de/dnszones/").prepare()
+    auth(request)
+    auth(request)
+
+    assert request.headers["Authorization"] == "Bearer second"
+    assert not auth.expired
+    assert login.call_count == 2
+
+
+def test_basic_auth_reauthenticate(requests_mock):
+    login = requests_mock.post(
+        "https://beta.api.core-networks.de/auth/token",
+        [{
+            "json": {
+                "token": "first",
+                "expires": 3600
+            }
+        }, {
+            "json": {
+                "token": "second",
+                "expires": 3600
+            }
+        }],
+    )
+
+    auth = CoreNetworksBasicAuth(
+        user="test", password="test", endpoint="https://beta.api.core-networks.de"
+    )
+    prepared = []
+    for _ in range(3):
+        request = Request(method="GET", url="https://beta.api.core-networks.de/dnszones/")
+        prepared.append(auth(request.prepare()))
+
+    # all requests were rejected with the same token but only one login happens
+    for request in prepared:
+        assert auth.reauthenticate(request)
+        assert request.headers["Authorization"] == "Bearer second"
+
+    assert login.call_count == 2
+
+
+def test_basic_auth_concurrent_refresh(requests_mock, mocker):
+    auth = CoreNetworksBasicAuth.__new__(CoreNetworksBasicAuth)
+    auth.refresh_margin = 60
+    auth.token_store = None
+    auth._lock = threading.Lock()
+    auth.token, auth.expires = "stale", datetime.datetime.now()
+
+    def slow_login():
+        time.sleep(0.1)
+        return "fresh", datetime.datetime.now() + datetime.timedelta(seconds=3600)
+
+    login = mocker.patch.object(auth, "_login", side_effect=slow_login)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tokens = list(executor.map(lambda _: auth.refresh(stale_token="stale"), range(8)))
+
+    assert tokens == ["fresh"] * 8
+    login.assert_called_once_with()
+
+
+def test_basic_auth_expired_refresh(mocker):
+    auth = CoreNetworksBasicAuth(
+        user="test", password="test", endpoint="https://beta.api.core-networks.de"
+    )
+    login = mocker.patch.object(
+        auth,
+        "_login",
+        return_value=("second", datetime.datetime.now() + datetime.timedelta(seconds=3600)),
+    )
+    auth.token, auth.expires = "first", datetime.datetime.now()
+
+    # a thread that saw the expiry of the first token refreshes once
+    assert auth.refresh(stale_token="first", expired=True) == "second"
+
+    # a thread that read the new token with the old expiry does not login again
+    assert auth.refresh(stale_token="second", expired=True) == "second"
+    login.assert_called_once_with()
+
+    # a rejected token is replaced even if it is not expired
+    assert auth.refresh(stale_token="second") == "second"
+    assert login.call_count == 2
@@ -0,0 +1,205 @@
+"""Test record cache class."""
+
+import threading
+import time
+
+import pytest
+
+from corenetworks.cache import RecordCache
+from corenetworks.cache import ResponseCache
+from corenetworks.cache import SingleFlight
+
+
+def test_cache_expiry(mocker):
+    clock = mocker.patch("corenetworks.cache.time.monotonic", return_value=100)
+    cache = RecordCache(ttl=10)
+
+    cache.put("example.com", [{"name": "test"}])
+    assert cache.get("example.com").to_list() == [{
+        "name": "test",
+        "ttl": None,
+        "type": None,
+        "data": None
+    }]
+
+    clock.return_value = 111
+    assert cache.get("example.com") is None
+    assert "example.com" not in cache
+
+
+def test_cache_lru():
+    cache = RecordCache(maxsize=2)
+
+    cache.put("a.com", [])
+    cache.put("b.com", [])
+    cache.get("a.com")
+    cache.put("c.com", [])
+
+    assert "a.com" in cache
+    assert "b.com" not in cache
+    assert "c.com" in cache
+
+
+def test_cache_write_through():
+    cache = RecordCache()
+    cache.put("example.com", [{"type": "A", "ttl": "1800", "name": "test", "data": "127.0.0.1"}])
+
+    cache.add("example.com", {"type": "AAAA", "ttl": 60, "name": "test", "data": "::1"})
+    cache.add("other.com", {"type": "AAAA", "ttl": 60, "name": "test", "data": "::1"})
+    assert len(cache.get("example.com")) == 2
+    assert "other.com" not in cache
+
+    cache.discard("example.com", {"type": "A"})
+    assert cache.get("example.com").to_list() == [{
+        "type": "AAAA",
+        "ttl": 60,
+        "name": "test",
+        "data": "::1"
+    }]
+
+    cache.discard("example.com", {"type": "AAAA", "force_all": False})
+    assert len(cache.get("example.com")) == 0
+
+    cache.discard("example.com", {"unknown": "value"})
+    assert "example.com" not in cache
+
+    cache.put("example.com", [])
+    cache.discard("example.com", {})
+    assert "example.com" not in cache
+
+
+def test_cache_expire_provider_records():
+    cache = RecordCache()
+    cache.put(
+        "example.com",
+        [
+            {
+                "type": "SOA",
+                "ttl": "1800",
+                "name": "@",
+                "data": "ns1. hostmaster. 1"
+            },
+            {
+                "type": "A",
+                "ttl": "1800",
+                "name": "www",
+                "data": "127.0.0.1"
+            },
+        ],
+    )
+
+    cache.expire("example.com")
+    assert len(cache.filter("example.com", {"name": "www"})) == 1
+    assert cache.filter("example.com", {"type": "SOA"}) is None
+    assert cache.filter("example.com", {}) is None
+
+    cache.put("example.com", [{"type": "SOA", "ttl": "1800", "name": "@", "data": "2"}])
+    assert len(cache.filter("example.com", {})) == 1
+
+
+def test_cache_version():
+    cache = RecordCache()
+
+    # a write between fetching and storing a zone discards the fetched records
+    version = cache.version("example.com")
+    cache.add("example.com", {"type": "A", "ttl": 60, "name": "www", "data": "127.0.0.1"})
+    cache.put("example.com", [], version=version)
+    assert "example.com" not in cache
+
+    cache.put("example.com", [], version=cache.version("example.com"))
+    assert "example.com" in cache
+
+
+def test_response_cache():
+    cache = ResponseCache(maxsize=2)
+    digest = cache.digest(b"[]")
+
+    entry = cache.put("/a", {"ETag": '"1"', "Last-Modified": "yesterday"}, digest, [])
+    assert cache.get("/a") is entry
+    assert entry.headers == {"If-None-Match": '"1"', "If-Modified-Since": "yesterday"}
+    assert cache.put("/b", {}, digest, []).headers == {}
+
+    cache.get("/a")
+    cache.put("/c", {}, digest, [])
+    assert cache.get("/b") is None
+    assert len(cache) == 2
+
+    cache.invalidate("/a")
+    assert cache.get("/a") is None
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_single_flight():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(1)
+        return ["result"]
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", slow)))
+    leader.start()
+    started.wait(1)
+
+    followers = [
+        threading.Thread(target=lambda: results.append(flight.do("key", slow))) for _ in range(3)
+    ]
+    for t in followers:
+        t.start()
+    while flight.coalesced < 3:
+        time.sleep(0.001)
+
+    release.set()
+    for t in [leader] + followers:
+        t.join(1)
+
+    assert len(calls) == 1
+    assert results == [(["result"], True)] * 4
+    assert len(flight) == 0
+
+    assert flight.do("key", lambda: 1) == (1, False)
+
+    with pytest.raises(ValueError):
+        flight.do("key", lambda: int("x"))
+    assert len(flight) == 0
+
+
+def test_single_flight_copy():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    shared = []
+
+    def slow():
+        started.set()
+        release.wait(1)
+        shared.append(["result"])
+        return shared[0]
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do("key", slow, copy=list)))
+    leader.start()
+    started.wait(1)
+
+    follower = threading.Thread(target=lambda: results.append(flight.do("key", slow, copy=list)))
+    follower.start()
+    while flight.coalesced < 1:
+        time.sleep(0.001)
+
+    release.set()
+    for t in [leader, follower]:
+        t.join(1)
+
+    assert results == [(["result"], True)] * 2
+    assert all(result is not shared[0] for (result, _) in results)
+    assert results[0][0] is not results[1][0]
+
+    # a result that is not shared is not copied
+    result = ["result"]
+    assert flight.do("key", lambda: result, copy=list)[0] is result
@@ -1,10 +1,17 @@
 """Test client class."""
 
+import datetime
+import subprocess
+import sys
+import threading
+import time
+
 import pytest
 import requests
 from six.moves.urllib.parse import parse_qs  # noqa
 from six.moves.urllib.parse import unquote  # noqa
 
+import corenetworks
 from corenetworks import CoreNetworks
 from corenetworks.authenticators import CoreNetworksBasicAuth
 from corenetworks.exceptions import AuthError
@@ -17,7 +24,9 @@ from corenetworks.test.fixtures.callback import records_post_callback
 
 @pytest.fixture
 def client(mocker):
-    mocker.patch.object(CoreNetworksBasicAuth, "_login", return_value=("testtoken", 3600))
+    mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
     client = CoreNetworks(user="testuser", password="testpass")
 
     return client
@@ -119,6 +128,26 @@ def test_filter_records(requests_mock, client):
     assert resp == [{"type": "A", "ttl": 1800, "name": "test", "data": "127.0.0.1"}]
 
 
+def test_filter_records_local(requests_mock, client):
+    get = requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        text=records_get_callback,
+    )
+
+    resp = client.records(zone="example.com", params={"data": {"contains": ":"}})
+    assert resp == [{"type": "AAAA", "ttl": 1800, "name": "test", "data": "::1"}]
+    assert get.last_request.query == ""
+
+    params = {"type": {"in": ["a", "aaaa"], "not": "A"}, "ttl": {"gte": 300}}
+    resp = list(client.iter_records(zone="example.com", params=params))
+    assert resp == [{"type": "AAAA", "ttl": 1800, "name": "test", "data": "::1"}]
+    assert get.last_request.qs == {"type[]": ["a", "aaaa"]}
+
+    with pytest.raises(ValidationError) as e:
+        client.records(zone="example.com", params={"name": {"regex": "("}})
+    assert str(e.value) == "Dataset invalid: '(' is not a 'regex'"
+
+
 def test_add_record(requests_mock, client, mocker):
     requests_mock.post(
         "https://beta.api.core-networks.de/dnszones/example.com/records/",
@@ -140,6 +169,44 @@ def test_add_record(requests_mock, client, mocker):
     client.commit.assert_called_once_with(zone="example.com")
 
 
+def test_add_record_round_trips(requests_mock, client):
+    url = "https://beta.api.core-networks.de/dnszones/example.com/records/"
+    existing = [
+        {
+            "type": "A",
+            "ttl": "300",
+            "name": "test",
+            "data": "127.0.0.1"
+        },
+        {
+            "type": "AAAA",
+            "ttl": "1800",
+            "name": "test",
+            "data": "::1"
+        },
+    ]
+    get = requests_mock.get(url, json=existing)
+    create = requests_mock.post(url, text=records_post_callback)
+    delete = requests_mock.post(url + "delete", text=records_post_callback)
+
+    record = {"type": "AAAA", "ttl": 1800, "name": "test", "data": "::1"}
+    assert client.add_record(zone="example.com", params=record) == [record]
+    assert get.last_request.query == "name=test"
+    assert requests_mock.call_count == 1
+
+    record = {"type": "A", "ttl": 1800, "name": "test", "data": "127.0.0.1"}
+    assert client.add_record(zone="example.com", params=record) == [record]
+    assert requests_mock.call_count == 4
+    assert delete.last_request.json() == dict(existing[0], ttl=300)
+    assert create.last_request.json() == record
+
+    record = {"type": "A", "ttl": 1800, "name": "test", "data": "10.0.0.1"}
+    resp = client.add_record(zone="example.com", params=record, verify=True)
+    assert resp == existing
+    assert requests_mock.call_count == 7
+    assert get.call_count == 4
+
+
 def test_delete_record(requests_mock, client, mocker):
     requests_mock.post(
         "https://beta.api.core-networks.de/dnszones/example.com/records/delete",
@@ -191,3 +258,642 @@ def test_commit(requests_mock, client):
 
     resp = client.commit(zone="example.com")
     assert resp == []
+
+
+def test_session_reuse(requests_mock, client, mocker):
+    requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/",
+        text='[{"name":"example.com","type":"master"}]'
+    )
+    send = mocker.spy(client._session, "send")
+
+    client.zones()
+    client.zones()
+
+    assert send.call_count == 2
+    assert client._auth.session is client._session
+
+
+def test_session_pool_config(mocker):
+    mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
+    client = CoreNetworks(
+        user="testuser", password="testpass", pool_maxsize=25, pool_block=True, keep_alive=False
+    )
+
+    adapter = client._session.get_adapter("https://beta.api.core-networks.de")
+    assert adapter._pool_maxsize == 25
+    assert adapter._pool_block is True
+    assert client._session.headers["Connection"] == "close"
+
+
+def test_context_manager(mocker):
+    mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
+
+    with CoreNetworks(user="testuser", password="testpass") as client:
+        close = mocker.spy(client._session, "close")
+
+    close.assert_called_once_with()
+
+
+def test_add_records(requests_mock, client, mocker):
+    requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        text=records_get_callback,
+    )
+    create = requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        text=records_post_callback,
+    )
+    delete = requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/delete",
+        text=records_post_callback,
+    )
+    mocker.patch.object(client, "commit")
+
+    records = [
+        {
+            "type": "A",
+            "ttl": 1800,
+            "name": "test",
+            "data": "127.0.0.1"
+        },
+        {
+            "type": "AAAA",
+            "ttl": 3600,
+            "name": "test",
+            "data": "::1"
+        },
+        {
+            "type": "A",
+            "ttl": 300,
+            "name": "new",
+            "data": "10.0.0.1"
+        },
+    ]
+
+    resp = client.add_records(zone="example.com", records=records, commit=True)
+    assert resp == records[1:]
+    assert requests_mock.call_count == 4
+    assert delete.call_count == 1
+    assert delete.last_request.json()["data"] == "::1"
+    assert [r.json() for r in create.request_history] == records[1:]
+    client.commit.assert_called_once_with(zone="example.com")
+
+
+def test_add_records_cname(requests_mock, client):
+    requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        text=records_get_callback,
+    )
+    create = requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        text=records_post_callback,
+    )
+
+    with pytest.raises(CorenetworksError) as e:
+        client.add_records(
+            zone="example.com",
+            records=[{
+                "type": "CNAME",
+                "ttl": 1800,
+                "name": "test",
+                "data": "other"
+            }]
+        )
+    assert str(e.value).startswith("A record with the same name already exist (test).")
+
+    resp = client.add_records(
+        zone="example.com",
+        records=[
+            {
+                "type": "CNAME",
+                "ttl": 1800,
+                "name": "www",
+                "data": "first"
+            },
+            {
+                "type": "CNAME",
+                "ttl": 1800,
+                "name": "www",
+                "data": "second"
+            },
+        ]
+    )
+    assert resp == [{"type": "CNAME", "ttl": 1800, "name": "www", "data": "second"}]
+    assert create.call_count == 1
+
+
+def test_sync_zone(requests_mock, client, mocker):
+    requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        text=records_get_callback,
+    )
+    create = requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        text=records_post_callback,
+    )
+    delete = requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/delete",
+        text=records_post_callback,
+    )
+    mocker.patch.object(client, "commit")
+
+    desired = [
+        {
+            "type": "A",
+            "ttl": 3600,
+            "name": "test",
+            "data": "127.0.0.1"
+        },
+        {
+            "type": "A",
+            "ttl": 300,
+            "name": "new",
+            "data": "10.0.0.1"
+        },
+    ]
+
+    dry = client.sync_zone(zone="example.com", records=desired, prune=True, dry_run=True)
+    assert dry == {
+        "delete": [
+            {
+                "type": "A",
+                "ttl": 1800,
+                "name": "test",
+                "data": "127.0.0.1"
+            },
+            {
+                "type": "AAAA",
+                "ttl": 1800,
+                "name": "test",
+                "data": "::1"
+            },
+        ],
+        "add": desired,
+    }
+    assert create.call_count == 0
+    assert delete.call_count == 0
+
+    changes = client.sync_zone(zone="example.com", records=desired, commit=True)
+    assert changes == {
+        "delete": [{
+            "type": "A",
+            "ttl": 1800,
+            "name": "test",
+            "data": "127.0.0.1"
+        }],
+        "add": desired,
+    }
+    assert delete.call_count == 1
+    assert delete.last_request.json() == {
+        "type": "A",
+        "ttl": 1800,
+        "name": "test",
+        "data": "127.0.0.1"
+    }
+    assert create.call_count == 2
+    client.commit.assert_called_once_with(zone="example.com")
+
+
+def test_sync_zone_unchanged(requests_mock, client, mocker):
+    requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        text=records_get_callback,
+    )
+    mocker.patch.object(client, "commit")
+
+    desired = [{"type": "A", "ttl": 1800, "name": "test", "data": "127.0.0.1"}]
+
+    changes = client.sync_zone(zone="example.com", records=desired, commit=True)
+    assert changes == {"delete": [], "add": []}
+    assert requests_mock.call_count == 1
+    client.commit.assert_not_called()
+
+
+def test_records_cache(requests_mock, mocker):
+    mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
+    client = CoreNetworks(user="testuser", password="testpass", cache_ttl=60)
+
+    get = requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        text=records_get_callback,
+    )
+    requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        text=records_post_callback,
+    )
+    requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/delete",
+        text=records_post_callback,
+    )
+    commit = requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/commit",
+        text=records_post_callback,
+    )
+
+    resp = client.records(zone="example.com", params={"type": "AAAA"})
+    assert resp == [{"type": "AAAA", "ttl": 1800, "name": "test", "data": "::1"}]
+    assert len(client.records(zone="example.com", params={"name": ["test"]})) == 2
+    assert get.call_count == 1
+
+    record = {"type": "A", "ttl": 300, "name": "www", "data": "10.0.0.1"}
+    assert client.add_record(zone="example.com", params=record) == [record]
+    client.delete_record(zone="example.com", params={"type": "AAAA"})
+
+    resp = client.records(zone="example.com")
+    assert resp == [
+        {
+            "type": "A",
+            "ttl": 1800,
+            "name": "test",
+            "data": "127.0.0.1"
+        },
+        {
+            "type": "A",
+            "ttl": 300,
+            "name": "www",
+            "data": "10.0.0.1"
+        },
+    ]
+    assert get.call_count == 1
+
+    # a commit only changes the SOA record, the cached records stay valid
+    client.commit(zone="example.com")
+    client.records(zone="example.com")
+    assert commit.call_count == 1
+    assert get.call_count == 1
+
+    client.delete_record(zone="example.com", params={"name": "www", "force_all": False})
+    assert client.records(zone="example.com", params={"name": "www"}) == []
+    assert get.call_count == 1
+
+
+def test_request_reauthenticate(requests_mock, client, mocker):
+    refresh = mocker.patch.object(client._auth, "refresh", return_value="newtoken")
+    zones = requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/",
+        [{
+            "status_code": 401
+        }, {
+            "text": '[{"name":"example.com","type":"master"}]'
+        }],
+    )
+
+    resp = client.zones()
+    assert resp == [{"name": "example.com", "type": "master"}]
+    refresh.assert_called_once_with(stale_token="testtoken")
+    assert zones.last_request.headers["Authorization"] == "Bearer newtoken"
+
+
+@pytest.fixture
+def retry_client(mocker):
+    mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
+    mocker.patch("corenetworks.retry.time.sleep")
+    client = CoreNetworks(user="testuser", password="testpass", retry=2)
+
+    return client
+
+
+def test_retry_idempotent(requests_mock, retry_client):
+    zones = requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/",
+        [
+            {
+                "exc": requests.ConnectionError
+            },
+            {
+                "status_code": 503
+            },
+            {
+                "text": '[{"name":"example.com","type":"master"}]'
+            },
+        ],
+    )
+
+    resp = retry_client.zones()
+    assert resp == [{"name": "example.com", "type": "master"}]
+    assert zones.call_count == 3
+
+
+def test_retry_exhausted(requests_mock, retry_client):
+    commit = requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/commit",
+        status_code=502,
+    )
+
+    with pytest.raises(CorenetworksError) as e:
+        retry_client.commit(zone="example.com")
+    assert str(e.value) == "Invalid response: 502 None"
+    assert commit.call_count == 3
+
+
+def test_retry_non_idempotent(requests_mock, retry_client):
+    create = requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        [{
+            "status_code": 429
+        }, {
+            "status_code": 500
+        }],
+    )
+    requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        text="[]",
+    )
+
+    with pytest.raises(CorenetworksError) as e:
+        retry_client.add_record(
+            zone="example.com",
+            params={
+                "type": "A",
+                "ttl": 1800,
+                "name": "test",
+                "data": "127.0.0.1"
+            },
+        )
+    assert str(e.value) == "Invalid response: 500 None"
+    assert create.call_count == 2
+
+
+def test_rate_limit(requests_mock, mocker):
+    mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
+    client = CoreNetworks(user="testuser", password="testpass", rate_limit=5)
+    acquire = mocker.spy(client._rate_limiter, "acquire")
+    requests_mock.get("https://beta.api.core-networks.de/dnszones/", text="[]")
+
+    client.zones()
+    client.zones()
+
+    assert acquire.call_count == 2
+
+
+def test_map_zones(client):
+    barrier = threading.Barrier(3, timeout=5)
+
+    def func(zone):
+        barrier.wait()
+        if zone == "broken.com":
+            raise CorenetworksError("broken")
+        return zone.upper()
+
+    results, errors = client.map_zones(func, ["a.com", "b.com", "broken.com"], max_workers=3)
+
+    assert results == {"a.com": "A.COM", "b.com": "B.COM"}
+    assert list(errors.keys()) == ["broken.com"]
+    assert str(errors["broken.com"]) == "broken"
+    assert client.map_zones(func, []) == ({}, {})
+
+
+def test_records_many(requests_mock, client):
+    for zone in ["example.com", "missing"]:
+        requests_mock.get(
+            "https://beta.api.core-networks.de/dnszones/{zone}/records/".format(zone=zone),
+            text=records_get_callback,
+        )
+
+    results, errors = client.records_many(["example.com", "missing"], params={"type": "AAAA"})
+    assert results == {
+        "example.com": [{
+            "type": "AAAA",
+            "ttl": 1800,
+            "name": "test",
+            "data": "::1"
+        }]
+    }
+    assert str(errors["missing"]) == "Invalid response: 404 None"
+
+
+def test_commit_many(requests_mock, client):
+    for zone in ["a.com", "b.com"]:
+        requests_mock.post(
+            "https://beta.api.core-networks.de/dnszones/{zone}/records/commit".format(zone=zone),
+            text=records_post_callback,
+        )
+
+    results, errors = client.commit_many(["a.com", "b.com"])
+    assert results == {"a.com": [], "b.com": []}
+    assert errors == {}
+
+
+def test_transaction(requests_mock, client):
+    requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/delete",
+        text=records_post_callback,
+    )
+    commit = requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/commit",
+        text=records_post_callback,
+    )
+
+    with client.transaction("example.com"):
+        with client.transaction("example.com"):
+            client.delete_record(zone="example.com", params={"type": "A"})
+        client.delete_record(zone="example.com", params={"type": "AAAA"})
+        assert commit.call_count == 0
+
+    assert commit.call_count == 1
+
+    with pytest.raises(RuntimeError):
+        with client.transaction("example.com"):
+            client.delete_record(zone="example.com", params={"type": "A"})
+            raise RuntimeError
+
+    assert commit.call_count == 1
+    assert client.flush() == ["example.com"]
+    assert client.flush() == []
+    assert commit.call_count == 2
+
+
+def test_commit_delay(requests_mock, mocker):
+    mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
+    client = CoreNetworks(user="testuser", password="testpass", auto_commit=True, commit_delay=0.2)
+    requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/delete",
+        text=records_post_callback,
+    )
+    commit = requests_mock.post(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/commit",
+        text=records_post_callback,
+    )
+
+    for _ in range(3):
+        client.delete_record(zone="example.com", params={"type": "A"})
+    assert commit.call_count == 0
+
+    time.sleep(0.4)
+    assert commit.call_count == 1
+
+    client.delete_record(zone="example.com", params={"type": "A"})
+    client.close()
+    assert commit.call_count == 2
+
+
+def test_iter_records(requests_mock, client):
+    for zone in ["example.com", "dict", "missing"]:
+        requests_mock.get(
+            "https://beta.api.core-networks.de/dnszones/{zone}/records/".format(zone=zone),
+            text=records_get_callback,
+        )
+
+    resp = client.iter_records(zone="example.com", params={"type": "A"})
+    assert not isinstance(resp, list)
+    assert list(resp) == [{"type": "A", "ttl": 1800, "name": "test", "data": "127.0.0.1"}]
+    assert list(client.iter_records(zone="example.com")) == client.records(zone="example.com")
+    assert list(client.iter_records(zone="dict")) == [{}]
+
+    with pytest.raises(CorenetworksError) as e:
+        list(client.iter_records(zone="missing"))
+    assert str(e.value) == "Invalid response: 404 None"
+
+
+def test_snapshot(requests_mock, client, tmp_path, mocker):
+    requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/",
+        text='[{"name":"example.com","type":"master"}]'
+    )
+    requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/",
+        text=records_get_callback,
+    )
+    path = str(tmp_path / "zones.snap")
+
+    assert client.snapshot(path) == ["example.com"]
+
+    with pytest.raises(CorenetworksError):
+        client.load_snapshot(path)
+
+    mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
+    cached = CoreNetworks(user="testuser", password="testpass", cache_ttl=60)
+    assert cached.load_snapshot(path) == ["example.com"]
+
+    calls = requests_mock.call_count
+    resp = cached.records(zone="example.com", params={"type": "AAAA"})
+    assert resp == [{"type": "AAAA", "ttl": 1800, "name": "test", "data": "::1"}]
+    assert requests_mock.call_count == calls
+
+
+def test_revalidate(requests_mock, mocker):
+    mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
+    client = CoreNetworks(user="testuser", password="testpass", revalidate=True)
+
+    zones = [{"name": "example.com", "type": "master"}]
+    get = requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/",
+        [
+            {
+                "json": zones,
+                "headers": {
+                    "ETag": '"v1"'
+                }
+            },
+            {
+                "status_code": 304
+            },
+            {
+                "json": zones
+            },
+            {
+                "json": [],
+                "headers": {
+                    "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"
+                }
+            },
+        ],
+    )
+    parse = mocker.spy(requests.Response, "json")
+
+    assert client.zones() == zones
+    assert "If-None-Match" not in get.last_request.headers
+
+    result = client.zones()
+    assert result == zones
+    assert get.last_request.headers["If-None-Match"] == '"v1"'
+    assert parse.call_count == 1
+
+    # unchanged body without validators is not parsed again
+    result[0]["name"] = "modified"
+    assert client.zones() == zones
+    assert parse.call_count == 1
+
+    assert client.zones() == []
+    assert parse.call_count == 2
+    assert client.zones() == []
+    assert get.last_request.headers["If-Modified-Since"] == "Wed, 21 Oct 2015 07:28:00 GMT"
+
+
+def test_coalesce(requests_mock, mocker):
+    mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
+    client = CoreNetworks(user="testuser", password="testpass", coalesce=True)
+
+    release = threading.Event()
+    records = [{"name": "test", "ttl": 1800, "type": "A", "data": "127.0.0.1"}]
+
+    def slow(request, context):
+        release.wait(1)
+        return records
+
+    get = requests_mock.get(
+        "https://beta.api.core-networks.de/dnszones/example.com/records/", json=slow
+    )
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(client.records("example.com")))
+        for _ in range(4)
+    ]
+    for t in threads:
+        t.start()
+    while client._flights.coalesced < 3:
+        time.sleep(0.001)
+
+    release.set()
+    for t in threads:
+        t.join(1)
+
+    assert get.call_count == 1
+    assert results == [records] * 4
+
+    # every caller gets its own copy
+    results[0][0]["ttl"] = 60
+    assert results[1][0]["ttl"] == 1800
+
+    client.records("example.com", {"type": "A"})
+    assert get.call_count == 2
+
+
+def test_lazy_import():
+    code = (
+        "import sys, corenetworks; "
+        "print(sorted(m for m in ('requests', 'jsonschema', 'asyncio', 'corenetworks.client') "
+        "if m in sys.modules)); "
+        "corenetworks.CoreNetworks; "
+        "print('jsonschema' in sys.modules, 'asyncio' in sys.modules)"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code]).decode("utf-8").split("\n")
+
+    assert output[0] == "[]"
+    assert output[1] == "False False"
+
+    assert corenetworks.CoreNetworks is CoreNetworks
+    assert "CoreNetworksPool" in dir(corenetworks)
+
+    with pytest.raises(AttributeError):
+        corenetworks.Missing
@@ -0,0 +1,231 @@
+"""Test the local API stand-in."""
+
+import time
+
+import pytest
+
+from corenetworks import CoreNetworks
+from corenetworks.exceptions import AuthError
+from corenetworks.exceptions import CorenetworksError
+from corenetworks.fake import FakeAdapter
+from corenetworks.fake import FakeBackend
+from corenetworks.fake import FakeServer
+from corenetworks.snapshot import load
+
+
+@pytest.fixture
+def server():
+    with FakeServer() as server:
+        server.backend.add_user("user", "password")
+        server.backend.add_zone(
+            "example.com",
+            records=[{
+                "name": "test",
+                "ttl": 1800,
+                "type": "A",
+                "data": "127.0.0.1"
+            }]
+        )
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    with CoreNetworks("user", "password", endpoint=server.endpoint) as client:
+        yield client
+
+
+def test_login(server):
+    # the login is deferred to the first request
+    with CoreNetworks("user", "wrong", endpoint=server.endpoint) as client:
+        with pytest.raises(AuthError):
+            client.zones()
+
+    with CoreNetworks(api_token="invalid", endpoint=server.endpoint) as client:
+        with pytest.raises(CorenetworksError) as e:
+            client.zones()
+    assert str(e.value) == "Invalid response: 401 Unauthorized"
+
+
+def test_zones(client):
+    assert client.zones() == [{"name": "example.com", "type": "master"}]
+    assert client.zone("example.com")[0]["name"] == "example.com"
+
+    with pytest.raises(CorenetworksError) as e:
+        client.zone("missing.com")
+    assert str(e.value) == "Invalid response: 404 Not Found"
+
+
+def test_records(server, client):
+    assert len(client.records("example.com")) == 5
+    assert client.records("example.com", {"type": ["A", "AAAA"]}) == [{
+        "name": "test",
+        "ttl": "1800",
+        "type": "A",
+        "data": "127.0.0.1"
+    }]
+    assert len(client.records("example.com", {"type": "NS", "ttl": 86400})) == 3
+
+    client.add_record("example.com", {"name": "test", "ttl": 60, "type": "A", "data": "127.0.0.1"})
+    client.add_record("example.com", {"name": "www", "ttl": 60, "type": "CNAME", "data": "test"})
+    assert client.records("example.com", {"name": ["test", "www"]}) == [
+        {
+            "name": "test",
+            "ttl": "60",
+            "type": "A",
+            "data": "127.0.0.1"
+        },
+        {
+            "name": "www",
+            "ttl": "60",
+            "type": "CNAME",
+            "data": "test"
+        },
+    ]
+
+    client.delete_record("example.com", {"name": "www"})
+    assert client.records("example.com", {"name": "www"}) == []
+
+    soa = client.records("example.com", {"type": "SOA"})[0]["data"]
+    client.commit("example.com")
+    assert client.records("example.com", {"type": "SOA"})[0]["data"] != soa
+    assert server.backend.commits("example.com") == 1
+
+
+def test_records_empty_filter(server, client, tmp_path):
+    path = str(tmp_path / "zones.snap")
+    client.snapshot(path)
+
+    cached = CoreNetworks("user", "password", endpoint=server.endpoint, cache_ttl=60)
+
+    # an empty list accepts no value on the API, the cache and the snapshot path
+    with cached, load(path) as snapshot:
+        for params in ({"name": []}, {"name": {"in": []}}, {"type": "A", "ttl": []}):
+            server.backend.requests = []
+            assert client.records("example.com", params) == []
+            assert list(client.iter_records("example.com", params)) == []
+            assert server.backend.requests == []
+
+            assert cached.records("example.com", params) == []
+            assert snapshot.records("example.com", params) == []
+
+        assert len(client.records("example.com", {"name": {"not": []}})) == 5
+
+
+def test_error_injection(server, mocker):
+    mocker.patch("corenetworks.retry.time.sleep")
+
+    with CoreNetworks("user", "password", endpoint=server.endpoint, retry=3) as client:
+        client._auth.login()
+        server.backend.inject_errors(2, status=503)
+        assert client.zones() == [{"name": "example.com", "type": "master"}]
+
+    assert [r[1] for r in server.backend.requests].count("/dnszones/") == 3
+
+
+def test_rate_limit():
+    backend = FakeBackend(rate_limit=1)
+    backend.add_token("token")
+
+    status, _, _ = backend.handle("GET", "/dnszones/", {"Authorization": "Bearer token"})
+    assert status == 200
+
+    status, headers, _ = backend.handle("GET", "/dnszones/", {"Authorization": "Bearer token"})
+    assert status == 429
+    assert headers["Retry-After"] == "1"
+
+
+def test_error_rate():
+    backend = FakeBackend(error_rate=1, error_status=500)
+    backend.add_token("token")
+
+    status, _, _ = backend.handle("GET", "/dnszones/", {"Authorization": "Bearer token"})
+    assert status == 500
+
+
+def test_adapter():
+    backend = FakeBackend()
+    backend.add_token("token")
+    backend.add_zone("example.com")
+
+    with CoreNetworks(api_token="token", endpoint="http://fake") as client:
+        client._session.mount("http://fake", FakeAdapter(backend))
+
+        assert client.zones() == [{"name": "example.com", "type": "master"}]
+        assert len(list(client.iter_records("example.com", {"type": "NS"}))) == 3
+
+        client.add_record("example.com", {"name": "test", "ttl": 60, "type": "A", "data": "::1"})
+        assert backend.records("example.com")[-1]["name"] == "test"
+
+        with pytest.raises(CorenetworksError) as e:
+            client.zone("missing.com")
+        assert str(e.value) == "Invalid response: 404 Not Found"
+
+
+def test_conditional_requests():
+    backend = FakeBackend()
+    backend.add_token("token")
+    backend.add_zone("example.com")
+
+    headers = {"Authorization": "Bearer token"}
+    status, response_headers, _ = backend.handle("GET", "/dnszones/", headers)
+    assert status == 200
+
+    headers["If-None-Match"] = response_headers["ETag"]
+    assert backend.handle("GET", "/dnszones/", headers)[0] == 304
+
+    backend.add_zone("example.org")
+    assert backend.handle("GET", "/dnszones/", headers)[0] == 200
+
+
+def test_sync_zone_prune(server, client, mocker):
+    desired = [{"name": "www", "ttl": 60, "type": "A", "data": "127.0.0.2"}]
+    delete = mocker.spy(client, "_delete_record_raw")
+
+    changes = client.sync_zone("example.com", desired, prune=True, commit=True)
+    assert changes["delete"] == [{"name": "test", "ttl": "1800", "type": "A", "data": "127.0.0.1"}]
+
+    # the API returns TTLs as strings, deletes send them as integers
+    stale = {"name": "test", "ttl": 1800, "type": "A", "data": "127.0.0.1"}
+    delete.assert_called_once_with("example.com", params=stale)
+
+    # provider managed SOA and apex NS records are kept
+    remaining = client.records("example.com")
+    assert sorted(r["type"] for r in remaining) == ["A", "NS", "NS", "NS", "SOA"]
+
+
+def test_failed_commit_stays_pending(server, client):
+    record = {"name": "www", "ttl": 60, "type": "A", "data": "127.0.0.2"}
+
+    with pytest.raises(CorenetworksError):
+        with client.transaction("example.com"):
+            client.add_records("example.com", [record], commit=True)
+            server.backend.inject_errors(1, status=500)
+
+    assert client._pending == {"example.com"}
+    assert client.flush() == ["example.com"]
+    assert server.backend.commits("example.com") == 1
+
+
+def test_failed_delayed_commit_stays_pending(server, mocker):
+    record = {"name": "www", "ttl": 60, "type": "A", "data": "127.0.0.2"}
+    warning = mocker.patch("corenetworks.client.logger.warning")
+
+    with CoreNetworks(
+        "user", "password", endpoint=server.endpoint, auto_commit=True, commit_delay=0.1
+    ) as client:
+        client.add_record("example.com", record)
+        server.backend.inject_errors(1, status=500)
+
+        for _ in range(100):
+            if warning.called:
+                break
+            time.sleep(0.01)
+
+        assert warning.call_count == 1
+        assert warning.call_args[0][1] == "example.com"
+        assert client._pending == {"example.com"}
+        assert server.backend.commits("example.com") == 0
+
+    # close commits the zone that is still pending
+    assert server.backend.commits("example.com") == 1
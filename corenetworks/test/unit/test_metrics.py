@@ -0,0 +1,161 @@
+"""Test request instrumentation and metrics."""
+
+import logging
+
+import pytest
+
+from corenetworks import CoreNetworks
+from corenetworks.exceptions import CorenetworksError
+from corenetworks.fake import FakeAdapter
+from corenetworks.fake import FakeBackend
+from corenetworks.metrics import Histogram
+from corenetworks.metrics import LoggingExporter
+from corenetworks.metrics import MetricsCollector
+from corenetworks.metrics import current_operation
+from corenetworks.metrics import operation
+
+ENDPOINT = "http://fake"
+
+
+@pytest.fixture
+def backend():
+    backend = FakeBackend()
+    backend.add_token("token")
+    backend.add_zone("example.com")
+    return backend
+
+
+def _client(backend, **kwargs):
+    client = CoreNetworks(api_token="token", endpoint=ENDPOINT, **kwargs)
+    client._session.mount(ENDPOINT, FakeAdapter(backend))
+    return client
+
+
+def _series(metrics, op, call):
+    return [m for m in metrics if m["operation"] == op and m["call"] == call]
+
+
+def test_operation():
+    assert current_operation() is None
+
+    with operation("outer"):
+        with operation("inner"):
+            assert current_operation() == "outer"
+        with operation(None):
+            assert current_operation() == "outer"
+
+    assert current_operation() is None
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(0.1, 1, float("inf")))
+    assert histogram.quantile(0.5) is None
+
+    for value in (0.05, 0.05, 0.5, 2):
+        histogram.observe(value)
+
+    result = histogram.to_dict()
+    assert result["count"] == 4
+    assert result["buckets"] == {"0.1": 2, "1": 1, "inf": 1}
+    assert result["p50"] == 0.1
+    assert result["p99"] == 2
+
+
+def test_hooks(backend):
+    events = []
+
+    def before(event):
+        event.request.headers["X-Trace"] = "1"
+
+    client = _client(backend, hooks={"before_request": before, "after_request": [events.append]})
+    client.zones()
+
+    event = events[0]
+    assert event.operation == "zones"
+    assert event.call == "zones"
+    assert event.method == "GET"
+    assert event.path == "/dnszones/"
+    assert event.url == "http://fake/dnszones/"
+    assert event.status == 200
+    assert event.bytes_received > 0
+    assert event.latency >= 0
+    assert event.retries == 0
+    assert event.request.headers["X-Trace"] == "1"
+
+    with pytest.raises(CorenetworksError) as e:
+        client.zone("missing.com")
+
+    assert events[-1].status == 404
+    assert events[-1].error is e.value
+    assert events[-1].path == "/dnszones/{zone}"
+
+    with pytest.raises(CorenetworksError) as e:
+        client.register_hook("unknown", events.append)
+    assert str(e.value) == "Unknown hook: unknown"
+
+
+def test_login_event(backend):
+    backend.add_user("user", "password")
+    events = []
+
+    client = CoreNetworks(
+        "user", "password", endpoint=ENDPOINT, hooks={"after_request": events.append}
+    )
+    client._session.mount(ENDPOINT, FakeAdapter(backend))
+    client.zones()
+
+    # the deferred login of the first request is reported on its own
+    login, zones = events
+    assert login.operation == "login"
+    assert login.call == "login"
+    assert login.method == "POST"
+    assert login.path == "/auth/token"
+    assert login.status == 200
+    assert login.latency >= 0
+    assert zones.operation == "zones"
+
+
+def test_metrics(backend, mocker):
+    mocker.patch("corenetworks.retry.time.sleep")
+
+    client = _client(backend, metrics=True, retry=2)
+    client.add_record("example.com", {"name": "www", "ttl": 60, "type": "A", "data": "::1"})
+
+    backend.inject_errors(1, status=503)
+    client.records_many(["example.com"])
+
+    metrics = client.metrics.snapshot()
+
+    lookups = _series(metrics, "add_record", "records")
+    assert len(lookups) == 1
+    assert lookups[0]["requests"] == 1
+    assert lookups[0]["path"] == "/dnszones/{zone}/records/{filter}"
+    assert lookups[0]["status"] == {"200": 1}
+    assert lookups[0]["latency"]["count"] == 1
+
+    post = _series(metrics, "add_record", "add_record")[0]
+    assert post["method"] == "POST"
+    assert post["status"] == {"204": 1}
+    assert post["bytes_sent"] > 0
+
+    bulk = _series(metrics, "records_many", "records")[0]
+    assert bulk["requests"] == 1
+    assert bulk["retries"] == 1
+    assert bulk["errors"] == 0
+
+
+def test_export(backend, caplog):
+    exporter = LoggingExporter()
+    collector = MetricsCollector(exporters=[exporter])
+
+    client = _client(backend, metrics=collector)
+    assert client.metrics is collector
+
+    client.zones()
+
+    with caplog.at_level(logging.INFO, logger="corenetworks.metrics"):
+        exported = collector.export(reset=True)
+
+    assert exported[0]["requests"] == 1
+    assert "zones:zones GET /dnszones/ requests=1" in caplog.text
+    assert collector.snapshot() == []
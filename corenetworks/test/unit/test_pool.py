@@ -0,0 +1,170 @@
+"""Test multi-account client pool."""
+
+import datetime
+
+import pytest
+
+from corenetworks.authenticators import CoreNetworksBasicAuth
+from corenetworks.exceptions import CorenetworksError
+from corenetworks.fake import FakeAdapter
+from corenetworks.fake import FakeBackend
+from corenetworks.pool import CoreNetworksPool
+from corenetworks.transport import MemoryTransport
+
+
+@pytest.fixture
+def backends():
+    backends = {}
+    for name, zones in (("one", ["example.com", "shared.com"]), ("two", ["example.org"])):
+        backend = backends[name] = FakeBackend()
+        backend.add_token("token-{name}".format(name=name))
+        for zone in zones:
+            backend.add_zone(zone)
+
+    backends["two"].add_zone("shared.com")
+    return backends
+
+
+@pytest.fixture
+def pool(backends):
+    accounts = dict((
+        name,
+        {
+            "api_token": "token-{name}".format(name=name),
+            "endpoint": "http://{name}".format(name=name),
+        },
+    ) for name in backends)
+
+    with CoreNetworksPool(accounts, auto_commit=True) as pool:
+        for name, backend in backends.items():
+            pool._session.mount("http://{name}".format(name=name), FakeAdapter(backend))
+        yield pool
+
+
+def test_pool_shared_session(mocker):
+    login = mocker.patch.object(
+        CoreNetworksBasicAuth, "_login", return_value=("testtoken", datetime.datetime.max)
+    )
+
+    accounts = {
+        "a": {
+            "user": "user",
+            "password": "password"
+        },
+        "b": {
+            "user": "user",
+            "password": "password"
+        },
+        "c": {
+            "user": "other",
+            "password": "password"
+        },
+    }
+
+    with CoreNetworksPool(accounts) as pool:
+        assert pool.accounts == ["a", "b", "c"]
+        assert pool.client("a") is pool.client("b")
+        assert pool.client("a") is not pool.client("c")
+        assert pool.client("c")._session is pool._session
+
+        # clients log in on their first request
+        assert login.call_count == 0
+        for name in pool.accounts:
+            pool.client(name)._auth.login()
+        assert login.call_count == 2
+
+        close = mocker.spy(pool._session, "close")
+
+        with pytest.raises(CorenetworksError) as e:
+            pool.client("missing")
+        assert str(e.value) == "Unknown account: missing"
+
+    close.assert_called_once_with()
+
+    with pytest.raises(CorenetworksError):
+        CoreNetworksPool({})
+
+
+def test_pool_routing(pool, backends):
+    assert pool.account("example.org") == "two"
+    assert pool.account("shared.com") == "one"
+    assert pool.refresh() == {"example.com": "one", "shared.com": "one", "example.org": "two"}
+
+    pool.add_record("example.org", {"name": "www", "ttl": 60, "type": "A", "data": "127.0.0.1"})
+    assert backends["two"].records("example.org")[-1]["name"] == "www"
+    assert backends["two"].commits("example.org") == 1
+
+    assert len(pool.records("example.com", {"type": "NS"})) == 3
+    assert pool.zone("example.org")[0]["name"] == "example.org"
+
+    with pytest.raises(CorenetworksError) as e:
+        pool.records("missing.com")
+    assert str(e.value) == "Zone not found in any account: missing.com"
+
+
+def test_pool_cross_account(pool):
+    zones = pool.zones()
+    assert sorted(zones) == ["one", "two"]
+    assert [z["name"] for z in zones["two"]] == ["example.org", "shared.com"]
+
+    results, errors = pool.records_many(["example.com", "example.org", "missing.com"])
+    assert sorted(results) == ["example.com", "example.org"]
+    assert list(errors) == ["missing.com"]
+
+    results, errors = pool.map_accounts(lambda name, client: len(client.zones()), ["two"])
+    assert results == {"two": 2}
+    assert errors == {}
+
+
+def test_pool_single_refresh(pool, backends):
+    for i in range(10):
+        backends["one"].add_zone("one-{i}.com".format(i=i))
+        backends["two"].add_zone("two-{i}.com".format(i=i))
+
+    zones = ["{a}-{i}.com".format(a=a, i=i) for a in ("one", "two") for i in range(10)]
+    results, errors = pool.records_many(zones)
+
+    assert errors == {}
+    assert len(results) == 20
+
+    # the cold index is built by a single zones() call per account
+    for backend in backends.values():
+        assert [r[1] for r in backend.requests].count("/dnszones/") == 1
+
+
+def test_pool_transport(backends):
+    accounts = dict((
+        name,
+        {
+            "api_token": "token-{name}".format(name=name),
+            "endpoint": "http://{name}".format(name=name),
+            "transport": MemoryTransport(backend),
+        },
+    ) for (name, backend) in backends.items())
+
+    with CoreNetworksPool(accounts) as pool:
+        assert pool.account("example.org") == "two"
+        assert pool.client("one").zones()[0]["name"] == "example.com"
+
+
+def test_pool_warm(backends):
+    accounts = {}
+    for (name, backend) in backends.items():
+        backend.add_user(name, "password")
+        accounts[name] = {
+            "user": name,
+            "password": "password",
+            "endpoint": "http://{name}".format(name=name),
+            "transport": MemoryTransport(backend),
+        }
+
+    with CoreNetworksPool(accounts) as pool:
+        assert all(backend.requests == [] for backend in backends.values())
+
+        pool.warm()
+        for backend in backends.values():
+            assert [r[1] for r in backend.requests] == ["/auth/token", "/dnszones/"]
+
+        # the index is built, routing needs no further requests
+        assert pool.account("example.org") == "two"
+        assert len(backends["two"].requests) == 2
@@ -0,0 +1,143 @@
+"""Test record set classes."""
+
+from corenetworks.records import Record
+from corenetworks.records import RecordSet
+from corenetworks.records import compile_filter
+from corenetworks.records import match_record
+from corenetworks.records import matches_nothing
+
+RECORDS = [
+    {
+        "type": "SOA",
+        "ttl": "86400",
+        "name": "@",
+        "data": "ns1.core-networks.de."
+    },
+    {
+        "type": "NS",
+        "ttl": "86400",
+        "name": "@",
+        "data": "ns1.core-networks.de."
+    },
+    {
+        "type": "A",
+        "ttl": "1800",
+        "name": "test",
+        "data": "127.0.0.1"
+    },
+    {
+        "type": "AAAA",
+        "ttl": "1800",
+        "name": "test",
+        "data": "::1"
+    },
+    {
+        "type": "A",
+        "ttl": "60",
+        "name": "www",
+        "data": "10.0.0.1"
+    },
+]
+
+
+def test_match_record():
+    record = {"type": "A", "ttl": "1800", "name": "test", "data": "127.0.0.1"}
+
+    assert match_record(record, {})
+    assert match_record(record, {"type": "A", "ttl": 1800})
+    assert match_record(record, {"type": ["A", "AAAA"], "ttl": [60, 1800]})
+    assert match_record(Record.from_dict(record), {"data": "127.0.0.1"})
+    assert not match_record(record, {"type": "AAAA"})
+    assert not match_record(record, {"name": ["www"], "type": "A"})
+
+
+def test_record():
+    record = Record.from_dict(RECORDS[2])
+
+    assert record.key == ("test", "A", "127.0.0.1")
+    assert record.to_dict() == RECORDS[2]
+    assert record == Record("test", 1800, "A", "127.0.0.1")
+    assert hash(record) == hash(Record("test", 1800, "A", "127.0.0.1"))
+    assert record != Record("test", 60, "A", "127.0.0.1")
+    assert not hasattr(record, "__dict__")
+
+
+def test_record_set_filter():
+    records = RecordSet(RECORDS)
+
+    assert len(records) == 5
+    assert records.to_list() == RECORDS
+    assert [r.to_dict() for r in records.filter({})] == RECORDS
+    assert [r.to_dict() for r in records.filter({"name": "test"})] == RECORDS[2:4]
+    assert [r.to_dict() for r in records.filter({"type": ["A"]})] == [RECORDS[2], RECORDS[4]]
+    assert [r.to_dict() for r in records.filter({"type": ["NS", "SOA"]})] == RECORDS[:2]
+    assert [r.to_dict() for r in records.filter({
+        "name": ["test", "www"],
+        "type": "A"
+    })] == [RECORDS[2], RECORDS[4]]
+    assert [r.to_dict() for r in records.filter({"ttl": 60})] == [RECORDS[4]]
+    assert records.filter({"name": "test", "data": "10.0.0.1"}) == []
+    assert records.filter({"name": "missing"}) == []
+
+
+def test_compile_filter():
+    pushdown, predicate = compile_filter({"type": ["A", "AAAA"], "ttl": 60})
+    assert pushdown == {"type": ["A", "AAAA"], "ttl": 60}
+    assert predicate is None
+
+    pushdown, predicate = compile_filter({
+        "name": {
+            "regex": "^t",
+            "not": "www"
+        },
+        "type": {
+            "in": ["A", "AAAA"],
+            "eq": "A"
+        },
+        "ttl": {
+            "gte": 300,
+            "lt": 3600
+        },
+    })
+    assert pushdown == {"type": ["A", "AAAA"]}
+    assert [r for r in RECORDS if predicate(r)] == [RECORDS[2]]
+    assert predicate(Record.from_dict(RECORDS[2]))
+    assert not predicate({"type": "A"})
+
+    pushdown, predicate = compile_filter({"name": {"in": []}, "type": "A"})
+    assert matches_nothing(pushdown)
+    assert not matches_nothing({"type": ["A"], "ttl": 60})
+
+
+def test_record_set_filter_operators():
+    records = RecordSet(RECORDS)
+
+    def names(params):
+        return [r.name for r in records.filter(params)]
+
+    assert names({"name": {"startswith": "t"}, "type": "A"}) == ["test"]
+    assert names({"name": {"endswith": "w"}}) == ["www"]
+    assert names({"data": {"contains": "core-networks"}, "type": {"not": ["SOA"]}}) == ["@"]
+    assert names({"ttl": {"gt": 60, "lte": 1800}}) == ["test", "test"]
+    assert names({"ttl": {"not": [86400, 1800]}}) == ["www"]
+    assert names({"type": {"eq": "AAAA"}}) == ["test"]
+
+    assert len(records.discard({"name": {"regex": "^(test|www)$"}})) == 3
+    assert len(records) == 2
+
+
+def test_record_set_modify():
+    records = RecordSet(RECORDS)
+
+    records.add({"type": "A", "ttl": 300, "name": "test", "data": "127.0.0.2"})
+    assert len(records.filter({"name": "test", "type": "A"})) == 2
+    assert {"type": "A", "ttl": 300, "name": "test", "data": "127.0.0.2"} in records
+
+    removed = records.discard({"name": "test", "type": "A"})
+    assert len(removed) == 2
+    assert records.filter({"name": "test"}) == [Record.from_dict(RECORDS[3])]
+    assert records.filter({"type": "A"}) == [Record.from_dict(RECORDS[4])]
+
+    records.discard({})
+    assert len(records) == 0
+    assert list(records) == []
@@ -0,0 +1,66 @@
+"""Test retry and rate limit policies."""
+
+import requests
+
+from corenetworks.retry import RetryPolicy
+from corenetworks.retry import TokenBucket
+
+
+def response(status_code, headers={}):
+    resp = requests.Response()
+    resp.status_code = status_code
+    resp.headers.update(headers)
+    return resp
+
+
+def test_is_retryable():
+    policy = RetryPolicy()
+
+    assert policy.is_retryable(503, idempotent=True)
+    assert policy.is_retryable(429, idempotent=False)
+    assert not policy.is_retryable(503, idempotent=False)
+    assert not policy.is_retryable(404, idempotent=True)
+
+
+def test_backoff():
+    policy = RetryPolicy(backoff_factor=1, backoff_max=5)
+
+    for attempt, limit in enumerate([1, 2, 4, 5, 5]):
+        assert limit / 2 <= policy.backoff(attempt) <= limit
+
+    assert RetryPolicy(backoff_factor=1, jitter=False).backoff(2) == 4
+
+
+def test_backoff_retry_after():
+    policy = RetryPolicy(backoff_max=10)
+
+    assert policy.backoff(0, response(429, {"Retry-After": "3"})) == 3
+    assert policy.backoff(0, response(429, {"Retry-After": "120"})) == 10
+    assert policy.backoff(0, response(503, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0
+    assert policy.backoff(0, response(503, {"Retry-After": "invalid"})) <= 0.5
+
+
+def test_token_bucket(mocker):
+    clock = mocker.patch("corenetworks.retry.time.monotonic", return_value=0)
+    sleep = mocker.patch("corenetworks.retry.time.sleep")
+    bucket = TokenBucket(rate=2, capacity=2)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0.5
+    assert bucket.acquire() == 1.0
+    sleep.assert_called_with(1.0)
+
+    clock.return_value = 10
+    assert bucket.acquire() == 0
+
+
+def test_token_bucket_try_acquire(mocker):
+    clock = mocker.patch("corenetworks.retry.time.monotonic", return_value=0)
+    bucket = TokenBucket(rate=2, capacity=1)
+
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0.5
+
+    clock.return_value = 0.5
+    assert bucket.try_acquire() == 0
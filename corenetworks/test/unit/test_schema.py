@@ -0,0 +1,46 @@
+"""Test schema validators."""
+
+import jsonschema
+import pytest
+
+from corenetworks.schema import SCHEMAS
+from corenetworks.schema import get_validator
+from corenetworks.schema import validation_error
+
+
+def test_validator_shared():
+    assert get_validator("filter") is get_validator("filter")
+    assert get_validator("record") is not get_validator("add_record")
+
+
+@pytest.mark.parametrize(
+    "name, data", [
+        ("add_record", {
+            "name": "test",
+            "type": "A",
+            "data": "127.0.0.1"
+        }),
+        ("add_record", {
+            "name": "test",
+            "type": "A",
+            "data": "127.0.0.1",
+            "ttl": "60"
+        }),
+        ("delete_record", {}),
+        ("delete_record", {
+            "type": 1
+        }),
+        ("filter", {
+            "type": ["A", 1]
+        }),
+    ]
+)
+def test_validation_error(name, data):
+    with pytest.raises(jsonschema.exceptions.ValidationError) as e:
+        jsonschema.validate(data, SCHEMAS[name])
+
+    assert validation_error(data, name).message == e.value.message
+
+
+def test_validation_valid():
+    assert validation_error({"type": ["A", "AAAA"], "ttl": 60}, "filter") is None
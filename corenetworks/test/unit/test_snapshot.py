@@ -0,0 +1,138 @@
+"""Test zone snapshots."""
+
+import pytest
+
+from corenetworks.exceptions import CorenetworksError
+from corenetworks.snapshot import Snapshot
+from corenetworks.snapshot import dump
+from corenetworks.snapshot import load
+
+ZONES = [{"name": "example.com", "type": "master"}, {"name": "empty.com", "type": "master"}]
+RECORDS = {
+    "example.com": [
+        {
+            "name": "@",
+            "ttl": "86400",
+            "type": "NS",
+            "data": "ns1.core-networks.de."
+        },
+        {
+            "name": "test",
+            "ttl": "1800",
+            "type": "A",
+            "data": "127.0.0.1"
+        },
+        {
+            "name": "test",
+            "ttl": "1800",
+            "type": "AAAA",
+            "data": "::1"
+        },
+        {
+            "name": "wörld",
+            "ttl": "60",
+            "type": "TXT",
+            "data": "hällo"
+        },
+    ],
+    "empty.com": [],
+}
+
+
+@pytest.fixture(params=[False, True], ids=["mmap", "compressed"])
+def snapshot(request, tmp_path):
+    path = str(tmp_path / "zones.snap")
+    dump(path, ZONES, RECORDS, compress=request.param)
+
+    with load(path) as snap:
+        yield snap
+
+
+def test_snapshot_zones(snapshot):
+    assert snapshot.zones() == ZONES
+    assert snapshot.zone("example.com") == [ZONES[0]]
+    assert snapshot.zone_names == ["empty.com", "example.com"]
+
+    with pytest.raises(CorenetworksError):
+        snapshot.zone("missing.com")
+
+
+def test_snapshot_records(snapshot):
+    records = snapshot.records("example.com")
+    assert [dict(r, ttl=str(r["ttl"])) for r in records] == RECORDS["example.com"]
+    assert snapshot.records("empty.com") == []
+
+    assert snapshot.records("example.com", {
+        "type": ["A", "AAAA"],
+        "ttl": 1800
+    }) == [
+        {
+            "name": "test",
+            "ttl": 1800,
+            "type": "A",
+            "data": "127.0.0.1"
+        },
+        {
+            "name": "test",
+            "ttl": 1800,
+            "type": "AAAA",
+            "data": "::1"
+        },
+    ]
+    assert snapshot.records("example.com", {"name": "wörld"}) == [{
+        "name": "wörld",
+        "ttl": 60,
+        "type": "TXT",
+        "data": "hällo"
+    }]
+    assert snapshot.records("example.com", {"name": "missing"}) == []
+    assert snapshot.records("example.com", {
+        "name": {
+            "startswith": "w"
+        },
+        "ttl": {
+            "lt": 1800
+        }
+    }) == [{
+        "name": "wörld",
+        "ttl": 60,
+        "type": "TXT",
+        "data": "hällo"
+    }]
+    assert len(snapshot.record_set("example.com").filter({"name": "test"})) == 2
+
+    # filter values are resolved through an index of the interned strings
+    index = snapshot._string_index
+    assert snapshot._string_ids(["test", "missing"]) == {index[b"test"]}
+    assert snapshot._string_index is index
+
+    with pytest.raises(CorenetworksError):
+        snapshot.records("missing.com")
+
+
+def test_snapshot_compressed_size(tmp_path):
+    records = {
+        "example.com": [{
+            "name": "host{}".format(i % 10),
+            "ttl": 3600,
+            "type": "A",
+            "data": "10.0.0.{}".format(i % 10)
+        } for i in range(1000)]
+    }
+    plain = tmp_path / "plain.snap"
+    compressed = tmp_path / "compressed.snap"
+
+    dump(str(plain), [], records)
+    dump(str(compressed), [], records, compress=True)
+
+    assert compressed.stat().st_size < plain.stat().st_size
+    with Snapshot(str(compressed)) as snap:
+        assert len(snap.records("example.com", {"name": "host1"})) == 100
+
+
+def test_snapshot_invalid(tmp_path):
+    path = tmp_path / "invalid.snap"
+    path.write_bytes(b"invalid data")
+
+    with pytest.raises(CorenetworksError):
+        load(str(path))
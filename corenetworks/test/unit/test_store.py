@@ -0,0 +1,113 @@
+"""Test token store classes."""
+
+import datetime
+import json
+import os
+import stat
+
+from corenetworks.authenticators import CoreNetworksBasicAuth
+from corenetworks.store import FileTokenStore
+
+ENDPOINT = "https://beta.api.core-networks.de"
+
+
+def test_file_store(tmp_path):
+    path = str(tmp_path / "cache" / "tokens.json")
+    store = FileTokenStore(path)
+    expires = datetime.datetime.now().replace(microsecond=0) + datetime.timedelta(seconds=3600)
+
+    assert store.get("test", "secret", ENDPOINT) is None
+
+    store.put("test", "secret", ENDPOINT, "mytoken", expires)
+    assert store.get("test", "secret", ENDPOINT) == ("mytoken", expires)
+    assert store.get("test", "wrong", ENDPOINT) is None
+    assert store.get("other", "secret", ENDPOINT) is None
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert os.listdir(str(tmp_path / "cache")) == ["tokens.json"]
+
+
+def test_file_store_secret(tmp_path):
+    store = FileTokenStore(str(tmp_path / "tokens.json"), iterations=1000)
+    expires = datetime.datetime.now() + datetime.timedelta(seconds=3600)
+
+    store.put("test", "secret", ENDPOINT, "mytoken", expires)
+    store.put("other", "secret", ENDPOINT, "mytoken", expires)
+
+    # same password, different salts
+    entries = list(store._read().values())
+    assert entries[0]["iterations"] == 1000
+    assert entries[0]["salt"] != entries[1]["salt"]
+    assert entries[0]["secret"] != entries[1]["secret"]
+    assert "secret" not in (tmp_path / "tokens.json").read_text().replace('"secret"', "")
+
+    # entries of older versions without a salt are ignored
+    key = store._key("test", ENDPOINT)
+    del entries[0]["salt"]
+    (tmp_path / "tokens.json").write_text(json.dumps({key: entries[0]}))
+    assert store.get("test", "secret", ENDPOINT) is None
+
+
+def test_file_store_derive_once(tmp_path, mocker):
+    store = FileTokenStore(str(tmp_path / "tokens.json"), iterations=1000)
+    derive = mocker.spy(FileTokenStore, "_secret")
+    expires = datetime.datetime.now() + datetime.timedelta(seconds=3600)
+
+    store.put("test", "secret", ENDPOINT, "old", expires)
+    salt = store._read()[store._key("test", ENDPOINT)]["salt"]
+
+    # a refresh reads and replaces the token with the hash of the first put
+    assert store.get("test", "secret", ENDPOINT) == ("old", expires)
+    store.put("test", "secret", ENDPOINT, "new", expires)
+    assert store.get("test", "secret", ENDPOINT) == ("new", expires)
+    assert derive.call_count == 1
+    assert store._read()[store._key("test", ENDPOINT)]["salt"] == salt
+
+    # another process derives the hash of a stored entry once
+    other = FileTokenStore(str(tmp_path / "tokens.json"), iterations=1000)
+    assert other.get("test", "secret", ENDPOINT) == ("new", expires)
+    assert other.get("test", "wrong", ENDPOINT) is None
+    assert other.get("test", "secret", ENDPOINT) == ("new", expires)
+    assert derive.call_count == 3
+
+
+def test_file_store_expired(tmp_path):
+    store = FileTokenStore(str(tmp_path / "tokens.json"))
+    expired = datetime.datetime.now() - datetime.timedelta(seconds=1)
+
+    store.put("test", "secret", ENDPOINT, "old", expired)
+    assert store.get("test", "secret", ENDPOINT) is None
+
+    store.put("other", "secret", ENDPOINT, "new", expired + datetime.timedelta(seconds=60))
+    assert len(store._read()) == 1
+
+
+def test_file_store_corrupt(tmp_path):
+    path = tmp_path / "tokens.json"
+    path.write_text("not json")
+
+    assert FileTokenStore(str(path)).get("test", "secret", ENDPOINT) is None
+
+
+def test_basic_auth_store(requests_mock, tmp_path):
+    login = requests_mock.post(
+        "https://beta.api.core-networks.de/auth/token",
+        json={
+            "token": "mytoken",
+            "expires": 3600
+        },
+    )
+    store = FileTokenStore(str(tmp_path / "tokens.json"))
+
+    first = CoreNetworksBasicAuth(
+        user="test", password="test", endpoint=ENDPOINT, token_store=store
+    )
+    second = CoreNetworksBasicAuth(
+        user="test", password="test", endpoint=ENDPOINT, token_store=store
+    )
+
+    assert first.login() == second.login() == "mytoken"
+    assert login.call_count == 1
+
+    # a rejected token is never taken from the store again
+    second.refresh(stale_token="mytoken")
+    assert login.call_count == 2
@@ -0,0 +1,51 @@
+"""Test incremental JSON parsing."""
+
+import json
+
+import pytest
+
+from corenetworks.exceptions import CorenetworksError
+from corenetworks.stream import iter_json_items
+
+RECORDS = [{
+    "type": "A",
+    "ttl": 1800,
+    "name": "täst",
+    "data": "127.0.0.1"
+}, {
+    "type": "TXT",
+    "ttl": "60",
+    "name": "@",
+    "data": "v=spf1 [x], {y}"
+}]
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 1024])
+def test_iter_json_items(size):
+    data = json.dumps(RECORDS, ensure_ascii=False, indent=2).encode("utf-8")
+
+    assert list(iter_json_items(chunked(data, size))) == RECORDS
+
+
+def test_iter_json_items_empty():
+    assert list(iter_json_items([b" [ ", b" ] "])) == []
+    assert list(iter_json_items([])) == []
+
+
+def test_iter_json_items_scalars():
+    assert list(iter_json_items([b"[12", b"34, tr", b"ue, 5", b"]"])) == [1234, True, 5]
+    assert list(iter_json_items([b"[1.", b"5e", b"3]"])) == [1500.0]
+
+
+def test_iter_json_items_object():
+    assert list(iter_json_items([b'{"name": ', b'"example.com"}'])) == [{"name": "example.com"}]
+
+
+@pytest.mark.parametrize("data", [b"[{}", b'[{"a": 1} {"b": 2}]', b"[] x", b"true"])
+def test_iter_json_items_invalid(data):
+    with pytest.raises(CorenetworksError):
+        list(iter_json_items(chunked(data, 3)))
@@ -0,0 +1,106 @@
+"""Test pluggable transports."""
+
+import asyncio
+import json
+
+import pytest
+from requests import Request
+from requests import Session
+
+from corenetworks import CoreNetworks
+from corenetworks.exceptions import CorenetworksError
+from corenetworks.fake import FakeBackend
+from corenetworks.transport import AsyncTransport
+from corenetworks.transport import HTTPTransport
+from corenetworks.transport import MemoryTransport
+from corenetworks.transport import RecordingTransport
+from corenetworks.transport import ReplayTransport
+
+ENDPOINT = "http://fake"
+
+
+@pytest.fixture
+def backend():
+    backend = FakeBackend()
+    backend.add_user("user", "password")
+    backend.add_zone("example.com")
+    return backend
+
+
+def test_default_transport():
+    client = CoreNetworks(api_token="token")
+
+    adapter = client._session.get_adapter("https://beta.api.core-networks.de/dnszones/")
+    assert isinstance(adapter, HTTPTransport)
+
+
+def test_memory_transport(backend):
+    transport = MemoryTransport(backend)
+
+    with CoreNetworks("user", "password", endpoint=ENDPOINT, transport=transport) as client:
+        assert client._session.get_adapter(ENDPOINT + "/auth/token") is transport
+        assert client.zones() == [{"name": "example.com", "type": "master"}]
+
+    assert [r[1] for r in backend.requests] == ["/auth/token", "/dnszones/"]
+    assert isinstance(MemoryTransport().backend, FakeBackend)
+
+
+def test_transport_shared_session(backend):
+    session = Session()
+
+    with pytest.raises(CorenetworksError):
+        CoreNetworks(
+            api_token="token", endpoint=ENDPOINT, session=session, transport=MemoryTransport()
+        )
+
+    assert session.get_adapter(ENDPOINT + "/dnszones/") is session.get_adapter("http://")
+
+
+def test_record_replay(backend, tmp_path):
+    recorder = RecordingTransport(MemoryTransport(backend))
+
+    with CoreNetworks("user", "password", endpoint=ENDPOINT, transport=recorder) as client:
+        zones = client.zones()
+        records = client.records("example.com", {"type": "NS"})
+        client.commit("example.com")
+
+    login = recorder.interactions[0]
+    assert json.loads(login["request"]["body"]) == {"login": "user", "password": "***"}
+    assert json.loads(login["response"]["body"])["token"] == "***"
+    assert recorder.interactions[2]["request"]["path"] == "/dnszones/example.com/records/?type=NS"
+
+    path = str(tmp_path / "recording.json")
+    recorder.save(path)
+
+    replay = ReplayTransport(path)
+    with CoreNetworks("user", "password", endpoint=ENDPOINT, transport=replay) as client:
+        assert client.zones() == zones
+        assert client.zones() == zones
+        assert client.records("example.com", {"type": "NS"}) == records
+        assert client.commit("example.com") == []
+
+        with pytest.raises(CorenetworksError) as e:
+            client.zone("example.com")
+        assert str(e.value) == "No recorded response for GET /dnszones/example.com"
+
+
+def test_async_transport(backend):
+    backend.add_token("token")
+    transport = AsyncTransport(MemoryTransport(backend))
+
+    headers = {"Authorization": "Bearer token"}
+    request = Request("GET", ENDPOINT + "/dnszones/", headers=headers).prepare()
+
+    loop = asyncio.new_event_loop()
+    try:
+        response = loop.run_until_complete(transport.asend(request))
+    finally:
+        loop.close()
+
+    assert response.status_code == 200
+    assert response.json() == [{"name": "example.com", "type": "master"}]
+
+    # mounted on a session it sends like the wrapped transport
+    with CoreNetworks(api_token="token", endpoint=ENDPOINT, transport=transport) as client:
+        assert client.zones() == [{"name": "example.com", "type": "master"}]
+    assert len(backend.requests) == 2
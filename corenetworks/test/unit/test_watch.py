@@ -0,0 +1,178 @@
+"""Test change detection."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from corenetworks import CoreNetworks
+from corenetworks import watch as watch_module
+from corenetworks.aio import AsyncCoreNetworks
+from corenetworks.exceptions import CorenetworksError
+from corenetworks.transport import MemoryTransport
+from corenetworks.watch import diff_records
+from corenetworks.watch import index_records
+from corenetworks.watch import record_key
+
+ENDPOINT = "http://fake"
+RECORD = {"name": "www", "ttl": 1800, "type": "A", "data": "127.0.0.1"}
+
+
+@pytest.fixture
+def transport():
+    transport = MemoryTransport()
+    transport.backend.add_token("token")
+    transport.backend.add_zone("example.com", records=[RECORD])
+    transport.backend.add_zone("example.org")
+    return transport
+
+
+def test_diff_records():
+    previous = index_records([
+        RECORD,
+        {
+            "name": "old",
+            "ttl": 60,
+            "type": "A",
+            "data": "127.0.0.2"
+        },
+        {
+            "name": "@",
+            "ttl": 60,
+            "type": "CNAME",
+            "data": "one.example.com."
+        },
+    ])
+    current = index_records([
+        dict(RECORD, ttl="1800"),
+        {
+            "name": "new",
+            "ttl": 60,
+            "type": "A",
+            "data": "127.0.0.3"
+        },
+        {
+            "name": "@",
+            "ttl": 60,
+            "type": "CNAME",
+            "data": "two.example.com."
+        },
+    ])
+
+    delta = diff_records(previous, current)
+    assert [r["name"] for r in delta["added"]] == ["new"]
+    assert [r["name"] for r in delta["removed"]] == ["old"]
+    assert [c["new"]["data"] for c in delta["changed"]] == ["two.example.com."]
+    assert diff_records(current, current) == {"added": [], "removed": [], "changed": []}
+
+
+def test_record_key():
+    assert record_key(RECORD) == ("www", "A", "127.0.0.1")
+    assert record_key({"name": "@", "type": "SOA", "data": "ns1"}) == ("@", "SOA")
+
+
+def test_watch(transport):
+    client = CoreNetworks(api_token="token", endpoint=ENDPOINT, transport=transport)
+    changes = client.watch(["example.com"], interval=0.01, initial=True)
+
+    initial = next(changes)
+    assert initial["zone"] == "example.com"
+    assert dict(RECORD, ttl="1800") in initial["added"]
+
+    client.add_record("example.com", {"name": "new", "ttl": 60, "type": "A", "data": "10.0.0.1"})
+    client.delete_record("example.com", {"name": "www", "type": "A"})
+    client.commit("example.com")
+
+    delta = next(changes)
+    assert delta["added"] == [{"name": "new", "ttl": "60", "type": "A", "data": "10.0.0.1"}]
+    assert delta["removed"] == [dict(RECORD, ttl="1800")]
+    assert [c["new"]["type"] for c in delta["changed"]] == ["SOA"]
+
+    changes.close()
+
+
+def test_watch_schedule(transport, mocker):
+    client = CoreNetworks(api_token="token", endpoint=ENDPOINT, transport=transport)
+    records = mocker.spy(client, "records")
+    stop = threading.Event()
+
+    def poll():
+        for _ in client.watch(interval=0.02, max_interval=0.08, stop=stop):
+            pass
+
+    thread = threading.Thread(target=poll)
+    thread.start()
+    stop.wait(0.3)
+    stop.set()
+    thread.join(1)
+
+    assert not thread.is_alive()
+
+    # stable zones back off, so both zones are polled far less than every 20ms
+    polled = [c[0][0] for c in records.call_args_list]
+    assert sorted(set(polled)) == ["example.com", "example.org"]
+    assert 4 <= len(polled) < 20
+
+
+def test_watch_busy_workers(transport, mocker):
+    for i in range(8):
+        transport.backend.add_zone("zone-{i}.com".format(i=i))
+
+    client = CoreNetworks(api_token="token", endpoint=ENDPOINT, transport=transport)
+    records = client.records
+
+    def slow_records(zone, *args, **kwargs):
+        time.sleep(0.05)
+        return records(zone, *args, **kwargs)
+
+    mocker.patch.object(client, "records", side_effect=slow_records)
+    waits = mocker.spy(watch_module, "wait")
+    stop = threading.Event()
+
+    def poll():
+        for _ in client.watch(interval=0.01, max_workers=2, stop=stop):
+            pass
+
+    thread = threading.Thread(target=poll)
+    thread.start()
+    stop.wait(0.3)
+    stop.set()
+    thread.join(1)
+
+    assert not thread.is_alive()
+
+    # overdue zones wait for a busy worker instead of polling wait() in a loop
+    assert client.records.call_count >= 4
+    assert waits.call_count <= client.records.call_count + 2
+
+
+def test_watch_errors(transport, mocker):
+    client = CoreNetworks(api_token="token", endpoint=ENDPOINT, transport=transport)
+    changes = client.watch(["missing.com"], interval=0.01)
+
+    delta = next(changes)
+    assert delta["zone"] == "missing.com"
+    assert isinstance(delta["error"], CorenetworksError)
+
+    changes.close()
+
+
+def test_async_watch(transport):
+
+    async def watch():
+        async with AsyncCoreNetworks(
+            api_token="token", endpoint=ENDPOINT, transport=transport
+        ) as client:
+            changes = client.watch(["example.com", "example.org"], interval=0.01, initial=True)
+            zones = [(await changes.__anext__())["zone"] for _ in range(2)]
+            await changes.aclose()
+            return zones
+
+    loop = asyncio.new_event_loop()
+    try:
+        zones = loop.run_until_complete(watch())
+    finally:
+        loop.close()
+
+    assert sorted(zones) == ["example.com", "example.org"]
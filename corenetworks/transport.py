@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+"""Pluggable HTTP transports."""
+
+import functools
+import io
+import json
+import threading
+from collections import defaultdict
+from collections import deque
+from http.client import responses
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .exceptions import CorenetworksError
+
+#: Keys of JSON request and response bodies that are never recorded.
+REDACTED_KEYS = ("password", "token")
+
+
+def build_response(request, status, headers=None, body=b""):
+    """
+    Create a `requests.Response` for a request from raw response parts.
+
+    Transports return `requests.Response` objects, this helper lets transports
+    that do not use `requests` for I/O build them.
+
+    Args:
+        request (requests.PreparedRequest): The sent request.
+        status (int): HTTP status code.
+        headers (dict): Response headers.
+        body (bytes): Response body.
+
+    """
+    response = Response()
+    response.status_code = status
+    response.reason = responses.get(status, "")
+    response.headers = CaseInsensitiveDict(headers or {})
+    response.encoding = "utf-8"
+    response.raw = io.BytesIO(body or b"")
+    response.url = request.url
+    response.request = request
+
+    return response
+
+
+class Transport(BaseAdapter):
+    """
+    Interface of the transports used by `corenetworks.client.CoreNetworks`.
+
+    A transport sends a prepared request and returns a `requests.Response`. It has
+    the interface of a `requests` transport adapter and is mounted on the session
+    of the client for the API endpoint, so API calls and logins use it. Retries,
+    rate limits and authentication are handled by the client.
+    """
+
+    def send(self, request, stream=False, **kwargs):
+        """
+        Send a request.
+
+        Args:
+            request (requests.PreparedRequest): The request to send.
+            stream (bool): Do not read the response body in advance.
+
+        Returns:
+            requests.Response: The response.
+
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release all resources of the transport."""
+
+
+class HTTPTransport(Transport, HTTPAdapter):
+    """
+    Synchronous transport with a pool of keep-alive connections.
+
+    This is the default transport, see `corenetworks.client.CoreNetworks` for the
+    pool options.
+    """
+
+    def send(self, request, stream=False, **kwargs):
+        return HTTPAdapter.send(self, request, stream=stream, **kwargs)
+
+    def close(self):
+        HTTPAdapter.close(self)
+
+
+class MemoryTransport(Transport):
+    """
+    Transport that dispatches requests to an in-process handler.
+
+    No sockets are involved, e.g. to run a client against a
+    `corenetworks.fake.FakeBackend` in tests and benchmarks.
+
+    Args:
+        handler: Object with a `handle(method, url, headers, body)` method that
+            returns the status code, the response headers and the response body.
+            Defaults to a new `corenetworks.fake.FakeBackend`.
+
+    """
+
+    def __init__(self, handler=None):
+        super(MemoryTransport, self).__init__()
+
+        if handler is None:
+            from .fake import FakeBackend
+
+            handler = FakeBackend()
+
+        self.handler = handler
+
+    @property
+    def backend(self):
+        return self.handler
+
+    def send(self, request, stream=False, **kwargs):
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+
+        status, headers, payload = self.handler.handle(
+            request.method, request.path_url, dict(request.headers.items()), body
+        )
+
+        response = build_response(request, status, headers, payload)
+        response.connection = self
+
+        return response
+
+    def close(self):
+        pass
+
+
+def _redact(body):
+    if not body:
+        return body
+
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+
+    if isinstance(data, dict) and any(k in data for k in REDACTED_KEYS):
+        for key in REDACTED_KEYS:
+            if key in data:
+                data[key] = "***"
+        return json.dumps(data)
+
+    return body
+
+
+def _text(body):
+    if isinstance(body, bytes):
+        return body.decode("utf-8")
+    return body
+
+
+class RecordingTransport(Transport):
+    """
+    Transport that records the traffic of another transport.
+
+    Passwords and tokens in JSON bodies are redacted, request headers are not
+    recorded. The recorded interactions can be saved and replayed with
+    `ReplayTransport`.
+
+    Args:
+        transport (Transport): The transport that sends the requests. Defaults to
+            `HTTPTransport`.
+
+    """
+
+    def __init__(self, transport=None):
+        super(RecordingTransport, self).__init__()
+        self.transport = transport or HTTPTransport()
+        self.interactions = []
+        self._lock = threading.Lock()
+
+    def send(self, request, stream=False, **kwargs):
+        response = self.transport.send(request, stream=stream, **kwargs)
+        content = response.content
+
+        interaction = {
+            "request": {
+                "method": request.method,
+                "path": request.path_url,
+                "body": _redact(_text(request.body)),
+            },
+            "response": {
+                "status": response.status_code,
+                "headers": dict(response.headers.items()),
+                "body": _redact(content.decode("utf-8")),
+            },
+        }
+
+        with self._lock:
+            self.interactions.append(interaction)
+
+        return response
+
+    def save(self, path):
+        """Write the recorded interactions to a JSON file."""
+        with self._lock:
+            interactions = list(self.interactions)
+
+        with open(path, "w") as f:
+            json.dump(interactions, f, indent=2)
+
+    def close(self):
+        self.transport.close()
+
+
+class ReplayTransport(Transport):
+    """
+    Transport that answers requests from recorded interactions.
+
+    Requests are matched by method and path including the query string.
+    Interactions with the same request are replayed in recorded order, the last
+    one is repeated once all others were used.
+
+    Args:
+        interactions (list|str): Interactions recorded by `RecordingTransport` or
+            the path of a saved recording.
+
+    """
+
+    def __init__(self, interactions):
+        super(ReplayTransport, self).__init__()
+
+        if isinstance(interactions, str):
+            with open(interactions) as f:
+                interactions = json.load(f)
+
+        self._lock = threading.Lock()
+        self._queues = defaultdict(deque)
+
+        for interaction in interactions:
+            request = interaction["request"]
+            self._queues[(request["method"], request["path"])].append(interaction["response"])
+
+    def send(self, request, stream=False, **kwargs):
+        with self._lock:
+            queue = self._queues.get((request.method, request.path_url))
+            if not queue:
+                raise CorenetworksError(
+                    "No recorded response for {method} {path}".format(
+                        method=request.method, path=request.path_url
+                    )
+                )
+
+            recorded = queue.popleft() if len(queue) > 1 else queue[0]
+
+        body = recorded["body"].encode("utf-8") if recorded["body"] else b""
+        return build_response(request, recorded["status"], recorded["headers"], body)
+
+    def close(self):
+        pass
+
+
+class AsyncTransport(Transport):
+    """
+    Transport that can also be awaited from an event loop.
+
+    `send` sends through the wrapped transport in the calling thread, so the
+    transport is mounted and used by the synchronous client like any other.
+    `asend` runs the same send in a worker pool and does not block the event loop.
+    `corenetworks.aio.AsyncCoreNetworks` wraps its transport in an
+    `AsyncTransport` that shares the worker pool of the client.
+
+    Args:
+        transport (Transport): The transport that sends the requests. Defaults to
+            `HTTPTransport`.
+        executor (concurrent.futures.Executor): Worker pool of `asend`. Defaults to
+            the default executor of the event loop.
+
+    """
+
+    def __init__(self, transport=None, executor=None):
+        super(AsyncTransport, self).__init__()
+        self.transport = transport or HTTPTransport()
+        self.executor = executor
+
+    def send(self, request, stream=False, **kwargs):
+        return self.transport.send(request, stream=stream, **kwargs)
+
+    async def asend(self, request, stream=False, **kwargs):
+        """Send a request without blocking the event loop, see `Transport.send`."""
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            functools.partial(self.transport.send, request, stream=stream, **kwargs),
+        )
+
+    def close(self):
+        self.transport.close()
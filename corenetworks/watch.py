@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""Change detection for DNS zones."""
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+
+from six import iteritems
+
+from .metrics import operation
+from .records import _ttl
+
+#: Record types that exist at most once per name, a new value is reported as change.
+SINGLETON_TYPES = ("SOA", "CNAME")
+
+
+def record_key(record):
+    """
+    Get the identity of a record used to detect changes.
+
+    Records are identified by name, type and data, records of `SINGLETON_TYPES`
+    only by name and type. A different TTL (or data of a singleton) is a change of
+    the same record.
+    """
+    if record.get("type") in SINGLETON_TYPES:
+        return (record.get("name"), record.get("type"))
+
+    return (record.get("name"), record.get("type"), record.get("data"))
+
+
+def index_records(records):
+    """Index a list of records by `record_key`."""
+    return dict((record_key(r), r) for r in records)
+
+
+def _changed(old, new):
+    return _ttl(old.get("ttl")) != _ttl(new.get("ttl")) or old.get("data") != new.get("data")
+
+
+def diff_records(previous, current):
+    """
+    Compare two record indexes.
+
+    Args:
+        previous (dict): Records indexed by `index_records`.
+        current (dict): Records indexed by `index_records`.
+
+    Returns:
+        dict: Lists of `added` and `removed` records and `changed` records as
+            dictionaries of the `old` and the `new` record.
+
+    """
+    delta = {"added": [], "removed": [], "changed": []}
+
+    for (key, record) in iteritems(current):
+        old = previous.get(key)
+        if old is None:
+            delta["added"].append(record)
+        elif _changed(old, record):
+            delta["changed"].append({"old": old, "new": record})
+
+    for (key, record) in iteritems(previous):
+        if key not in current:
+            delta["removed"].append(record)
+
+    return delta
+
+
+def watch(
+    client,
+    zones=None,
+    interval=60,
+    max_interval=None,
+    max_workers=None,
+    initial=False,
+    stop=None,
+):
+    """
+    Poll DNS zones and yield record-level changes.
+
+    See `corenetworks.client.CoreNetworks.watch`.
+    """
+    if zones is None:
+        zones = [z["name"] for z in client.zones()]
+
+    zones = list(zones)
+    max_interval = max(interval, max_interval or interval)
+    max_workers = max_workers or client.config["pool_maxsize"]
+    stop = stop or threading.Event()
+
+    if not zones:
+        return
+
+    def fetch(zone):
+        with operation("watch"):
+            return client.records(zone)
+
+    # spread the first polls over one interval
+    now = time.monotonic()
+    due = dict((zone, now + interval * i / len(zones)) for i, zone in enumerate(zones))
+    intervals = dict((zone, interval) for zone in zones)
+    snapshots = {}
+    running = {}
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while not stop.is_set():
+            now = time.monotonic()
+            idle = sorted((z for z in zones if z not in running.values()), key=due.get)
+
+            for zone in idle:
+                if due[zone] > now or len(running) >= max_workers:
+                    break
+                running[executor.submit(fetch, zone)] = zone
+
+            # with all workers busy an overdue zone can only start after a poll finished
+            timeout = None
+            waiting = [due[z] for z in zones if z not in running.values()]
+            if waiting and len(running) < max_workers:
+                timeout = max(0, min(waiting) - time.monotonic())
+
+            if running:
+                done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+            else:
+                stop.wait(timeout)
+                continue
+
+            for future in done:
+                zone = running.pop(future)
+
+                try:
+                    current = index_records(future.result())
+                except Exception as e:  # noqa
+                    intervals[zone] = min(max_interval, intervals[zone] * 2)
+                    due[zone] = time.monotonic() + intervals[zone]
+                    yield {"zone": zone, "error": e}
+                    continue
+
+                previous = snapshots.get(zone)
+                snapshots[zone] = current
+
+                if previous is None:
+                    delta = diff_records({}, current) if initial else None
+                else:
+                    delta = diff_records(previous, current)
+
+                changed = bool(delta and any(delta.values()))
+
+                # poll changing zones at the base interval and back off for stable zones
+                if changed or previous is None:
+                    intervals[zone] = interval
+                else:
+                    intervals[zone] = min(max_interval, intervals[zone] * 2)
+                due[zone] = time.monotonic() + intervals[zone]
+
+                if changed:
+                    delta["zone"] = zone
+                    yield delta
+    finally:
+        executor.shutdown(wait=False)